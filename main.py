@@ -3,30 +3,50 @@ import asyncio
 import logging
 import os
 from datetime import datetime
-from src import DocumentationProcessor, RAGManager, Config
-from src.token_aggregator import TokenAggregator
 
-# Configure logging
-# Create logs directory if it doesn't exist
-os.makedirs(Config.LOG_DIR, exist_ok=True)
-
-# Set LOG_DIR environment variable for LightRAG
-os.environ['LOG_DIR'] = str(Config.LOG_DIR)
-
-# Configure logging with file handler
-log_filename = Config.LOG_DIR / f"dbchat3_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()  # Keep console output
-    ]
-)
+# Application modules are imported inside the mode functions: they pull in
+# LightRAG, the database drivers and the provider SDKs, which --help and
+# argument errors never need
 logger = logging.getLogger(__name__)
 
-async def process_database_files():
-    """Process all database files and build RAG index"""
+def configure_logging(debug: bool = False):
+    """Configure console and file logging (loads the configuration)"""
+    from src import Config
+    
+    # Create logs directory if it doesn't exist
+    os.makedirs(Config.LOG_DIR, exist_ok=True)
+    
+    # Set LOG_DIR environment variable for LightRAG
+    os.environ['LOG_DIR'] = str(Config.LOG_DIR)
+    
+    # Configure logging with file handler
+    log_filename = Config.LOG_DIR / f"dbchat3_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_filename),
+            logging.StreamHandler()  # Keep console output
+        ]
+    )
+    
+    if debug:
+        # Only raise our own loggers; third-party libraries stay at INFO
+        for name in ("src", "__main__"):
+            logging.getLogger(name).setLevel(logging.DEBUG)
+
+async def process_database_files(pipelined: bool = False, incremental: bool = False):
+    """Process all database files and build RAG index
+    
+    Args:
+        pipelined: Insert each document into the RAG index as soon as it is
+            generated instead of waiting for all documentation to finish
+        incremental: Update the existing RAG index with changed documents
+            instead of clearing the databases and rebuilding it
+    """
+    from src import Config, DocumentationProcessor, RAGManager
+    from src.token_aggregator import TokenAggregator
+    
     # Validate all configuration at startup
     try:
         Config.validate_all_config()
@@ -55,31 +75,96 @@ async def process_database_files():
     # Create token aggregator for unified tracking
     token_aggregator = TokenAggregator(llm_client, rag_manager)
     
-    # Process SQL files
-    doc_processor.process_sql_files()
+    if pipelined:
+        await generate_and_insert_pipelined(doc_processor, rag_manager)
+    elif incremental:
+        # Process SQL files, keeping the RAG storage in the working directory
+        doc_processor.process_sql_files(incremental=True)
+        
+        # Initialize RAG and apply only the changed documents
+        await rag_manager.initialize()
+        await rag_manager.sync_documents()
+    else:
+        # Process SQL files
+        doc_processor.process_sql_files()
+        
+        # Clear databases before starting
+        logger.info("Clearing Neo4j database...")
+        rag_manager.clear_neo4j_database()
+        
+        logger.info("Clearing MongoDB database...")
+        rag_manager.clear_mongodb_database()
+        
+        # Initialize RAG
+        await rag_manager.initialize()
+        
+        # Insert documents
+        await rag_manager.insert_documents()
+    
+    # Report unified token usage
+    if Config.ENABLE_TOKEN_TRACKING:
+        print(token_aggregator.get_summary(detailed=True))
     
-    # Clear databases before starting
+    logger.info("Database file processing completed")
+    return rag_manager, token_aggregator
+
+async def generate_and_insert_pipelined(doc_processor, rag_manager):
+    """Generate documentation and insert it into the RAG index concurrently
+    
+    Documentation generation runs in a worker thread and hands every finished
+    document to a bounded queue, which RAGManager.insert_documents consumes
+    while later documents are still being generated.
+    """
+    from src import Config
+    
+    # Clear databases and prepare an empty working directory before starting
     logger.info("Clearing Neo4j database...")
     rag_manager.clear_neo4j_database()
     
     logger.info("Clearing MongoDB database...")
     rag_manager.clear_mongodb_database()
     
+    doc_processor.reset_working_dir()
+    
     # Initialize RAG
     await rag_manager.initialize()
     
-    # Insert documents
-    await rag_manager.insert_documents()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=Config.PIPELINE_QUEUE_SIZE)
     
-    # Report unified token usage
-    if Config.ENABLE_TOKEN_TRACKING:
-        print(token_aggregator.get_summary(detailed=True))
+    def on_doc_ready(md_file):
+        # Called from the generation thread; blocks while the queue is full
+        asyncio.run_coroutine_threadsafe(queue.put(md_file), loop).result()
     
-    logger.info("Database file processing completed")
-    return rag_manager, token_aggregator
+    async def produce():
+        try:
+            await asyncio.to_thread(doc_processor.process_sql_files, on_doc_ready)
+        finally:
+            await queue.put(None)
+    
+    logger.info(f"Starting pipelined generation and insertion (queue size {Config.PIPELINE_QUEUE_SIZE})")
+    producer = asyncio.create_task(produce())
+    try:
+        await rag_manager.insert_documents(queue=queue)
+    finally:
+        # Keep draining if insertion stopped early so the producer never blocks on a full queue
+        while not producer.done():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                await asyncio.sleep(0.1)
+        await producer
 
-async def run_pipeline():
-    """Run RAG pipeline without generating documentation (assumes MD files exist)"""
+async def run_pipeline(incremental: bool = False):
+    """Run RAG pipeline without generating documentation (assumes MD files exist)
+    
+    Args:
+        incremental: Update the existing RAG index with changed documents
+            instead of clearing the databases and rebuilding it
+    """
+    from src import Config, DocumentationProcessor, RAGManager
+    from src.token_aggregator import TokenAggregator
+    
     # Validate all configuration at startup
     try:
         Config.validate_all_config()
@@ -99,21 +184,29 @@ async def run_pipeline():
     # Create token aggregator (only RAG tracking in this mode)
     token_aggregator = TokenAggregator(rag_manager=rag_manager)
     
-    # Clear databases before starting
-    logger.info("Clearing Neo4j database...")
-    rag_manager.clear_neo4j_database()
-    
-    logger.info("Clearing MongoDB database...")
-    rag_manager.clear_mongodb_database()
-    
-    # Recreate working directory and copy existing MD files
-    doc_processor.recreate_working_dir_and_copy_docs()
-    
-    # Initialize RAG
-    await rag_manager.initialize()
-    
-    # Insert documents
-    await rag_manager.insert_documents()
+    if incremental:
+        # Synchronize MD files, keeping the RAG storage in the working directory
+        doc_processor.sync_docs_to_working_dir()
+        
+        # Initialize RAG and apply only the changed documents
+        await rag_manager.initialize()
+        await rag_manager.sync_documents()
+    else:
+        # Clear databases before starting
+        logger.info("Clearing Neo4j database...")
+        rag_manager.clear_neo4j_database()
+        
+        logger.info("Clearing MongoDB database...")
+        rag_manager.clear_mongodb_database()
+        
+        # Recreate working directory and copy existing MD files
+        doc_processor.recreate_working_dir_and_copy_docs()
+        
+        # Initialize RAG
+        await rag_manager.initialize()
+        
+        # Insert documents
+        await rag_manager.insert_documents()
     
     # Report unified token usage  
     if Config.ENABLE_TOKEN_TRACKING:
@@ -122,26 +215,52 @@ async def run_pipeline():
     logger.info("RAG pipeline completed")
     return rag_manager, token_aggregator
 
+async def open_existing_index():
+    """Validate the configuration and open the existing RAG index for querying"""
+    from src import Config, RAGManager
+    
+    # Validate all configuration at startup
+    try:
+        Config.validate_all_config()
+        logger.info("Configuration validated successfully")
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        print(f"\nConfiguration error: {e}")
+        print("Please check your .env file and ensure all required settings are configured.")
+        raise SystemExit(1)
+    rag_manager = RAGManager()
+    await rag_manager.initialize()
+    
+    # Attach to the existing index; documents are only re-inserted if it is stale
+    await rag_manager.ensure_index_current()
+    return rag_manager
+
+async def warm_up(rag_manager):
+    """Load models, indexes and caches now rather than on the first query (if WARMUP_ENABLED)
+    
+    Called by every query mode, whether it opened the existing index or
+    continues from --process_database_files or --run_pipeline.
+    """
+    from pathlib import Path
+    from src import Config
+    
+    if Config.WARMUP_ENABLED:
+        from src.batch_query import load_questions
+        queries = load_questions(Path(Config.WARMUP_QUERIES_FILE)) if Config.WARMUP_QUERIES_FILE else []
+        await rag_manager.warm_up([(mode, question) for _, mode, question in queries])
+
 async def chat_mode(rag_manager=None, token_aggregator=None):
     """Interactive chat mode"""
+    from src.token_aggregator import TokenAggregator
+    
     # If RAG manager not provided, create one for existing data
     if not rag_manager:
-        # Validate all configuration at startup
-        try:
-            Config.validate_all_config()
-            logger.info("Configuration validated successfully")
-        except ValueError as e:
-            logger.error(f"Configuration error: {e}")
-            print(f"\nConfiguration error: {e}")
-            print("Please check your .env file and ensure all required settings are configured.")
-            raise SystemExit(1)
-        rag_manager = RAGManager()
-        await rag_manager.initialize()
-        await rag_manager.insert_documents()
+        rag_manager = await open_existing_index()
         
         # Create token aggregator if not provided
         if not token_aggregator:
             token_aggregator = TokenAggregator(rag_manager=rag_manager)
+    await warm_up(rag_manager)
     
     print("\n" + "="*50)
     print("DBChat3 - Interactive Query Mode")
@@ -163,7 +282,7 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
     print("="*50 + "\n")
     
     current_mode = "hybrid"  # Default mode
-    conversation_history = []  # Store conversation history
+    conversation_history = rag_manager.create_conversation_history()  # Kept within HISTORY_MAX_TOKENS
     show_token_usage = True  # Default to showing token usage
     
     # Enable token tracking by default and reset for chat session
@@ -197,16 +316,21 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
             
             # Check for show history command
             if query.lower() == '/history':
-                if not conversation_history:
+                messages = conversation_history.messages()
+                if not messages:
                     print("No conversation history.")
                 else:
+                    stats = conversation_history.get_stats()
                     print("\nConversation History:")
                     print("-" * 30)
-                    for i, msg in enumerate(conversation_history):
+                    for i, msg in enumerate(messages):
                         role = msg["role"].capitalize()
                         content = msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
                         print(f"{i+1}. {role}: {content}")
                     print("-" * 30)
+                    print(f"~{stats['tokens']} of {conversation_history.max_tokens} tokens "
+                          f"({stats['summarized_turns']} turns summarized, {stats['dropped_turns']} dropped, "
+                          f"{stats['shortened_answers']} answers shortened)")
                 continue
             
             # Check for token commands
@@ -234,9 +358,12 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
                 test_query = input("Enter query to test all modes> ").strip()
                 if test_query:
                     print("\n" + "="*50)
-                    results = await rag_manager.query_all_modes(test_query, conversation_history)
+                    results = await rag_manager.query_all_modes(test_query, conversation_history.messages())
+                    mode_stats = rag_manager.get_mode_stats()
                     for mode, result in results.items():
-                        print(f"\nResult ({mode.capitalize()}):")
+                        stats = mode_stats.get(mode, {})
+                        source = "cached" if stats.get("cached") else f"{stats.get('latency_ms', 0) / 1000:.1f}s"
+                        print(f"\nResult ({mode.capitalize()}, {source}):")
                         print(result)
                         print("\n" + "-"*50)
                     
@@ -247,20 +374,35 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
                         print(f"  Total: {usage.get('total_tokens', 0)}, "
                               f"Prompt: {usage.get('prompt_tokens', 0)}, "
                               f"Completion: {usage.get('completion_tokens', 0)}")
+                        for name, stats in mode_stats.items():
+                            tokens = stats["tokens"]
+                            print(f"  {name.capitalize()}: {tokens['total_tokens']} "
+                                  f"({tokens['prompt_tokens']} prompt, {tokens['completion_tokens']} completion), "
+                                  f"{stats['latency_ms']:.0f} ms")
                 continue
             
             if query:
                 print("\nSearching...")
                 
-                # Add user query to conversation history
-                conversation_history.append({"role": "user", "content": query})
-                
-                result = await rag_manager.query(query, mode=current_mode, conversation_history=conversation_history)
+                # Print the answer as it is generated
+                stream = await rag_manager.query(query, mode=current_mode,
+                                                 conversation_history=conversation_history.messages(), stream=True)
                 print("\nResult:")
-                print(result)
+                chunks = []
+                async for chunk in stream:
+                    print(chunk, end="", flush=True)
+                    chunks.append(chunk)
+                print()
+                result = "".join(chunks)
+                query_stats = rag_manager.get_last_query_stats()
                 
-                # Add assistant response to conversation history
-                conversation_history.append({"role": "assistant", "content": result})
+                # Add the turn to the conversation history, compacting older turns if over budget;
+                # a failed answer is left out so follow-up questions do not build on it.
+                # This comes before the usage line so a summary call is counted for this turn.
+                if query_stats.get('error'):
+                    print("(This answer was not added to the conversation history)")
+                else:
+                    await conversation_history.add_turn(query, result)
                 
                 # Show token usage for this query
                 if show_token_usage:
@@ -268,10 +410,13 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
                     query_total = usage.get('total_tokens', 0)
                     query_prompt = usage.get('prompt_tokens', 0)
                     query_completion = usage.get('completion_tokens', 0)
+                    first_token_ms = query_stats.get('time_to_first_token_ms')
+                    first_token = f"{first_token_ms / 1000:.1f}s" if first_token_ms is not None else "n/a"
                     
                     print(f"\n[Token usage - Total: {query_total}, "
                           f"Prompt: {query_prompt}, "
-                          f"Completion: {query_completion}]")
+                          f"Completion: {query_completion}, "
+                          f"First token: {first_token}]")
         
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
@@ -283,6 +428,53 @@ async def chat_mode(rag_manager=None, token_aggregator=None):
             logger.error(f"Error processing query: {e}")
             print(f"Error: {e}")
 
+async def serve_mode(rag_manager=None, token_aggregator=None):
+    """Serve queries over HTTP from one warm RAG instance"""
+    import uvicorn
+    from src import Config
+    from src.server import create_app
+    
+    # If RAG manager not provided, create one for existing data
+    if not rag_manager:
+        rag_manager = await open_existing_index()
+    await warm_up(rag_manager)
+    
+    app = create_app(rag_manager, token_aggregator)
+    logger.info(f"Serving queries on http://{Config.SERVER_HOST}:{Config.SERVER_PORT}")
+    
+    # log_config=None keeps the logging configured by configure_logging
+    server = uvicorn.Server(uvicorn.Config(app, host=Config.SERVER_HOST, port=Config.SERVER_PORT, log_config=None))
+    await server.serve()
+
+async def batch_query_mode(questions_file: str, output_file: str = None, rag_manager=None):
+    """Answer a file of questions concurrently and write the results as JSONL"""
+    from pathlib import Path
+    from src import Config
+    from src.batch_query import load_questions, run_batch
+    
+    questions_path = Path(questions_file)
+    output_path = Path(output_file) if output_file else questions_path.with_name(f"{questions_path.stem}_results.jsonl")
+    questions = load_questions(questions_path)
+    if not questions:
+        print(f"No questions found in {questions_path}")
+        return
+    
+    # If RAG manager not provided, create one for existing data
+    if not rag_manager:
+        rag_manager = await open_existing_index()
+    await warm_up(rag_manager)
+    
+    print(f"\nAnswering {len(questions)} questions from {questions_path} "
+          f"({Config.BATCH_QUERY_CONCURRENCY} at a time)...")
+    summary = await run_batch(rag_manager, questions, output_path, Config.BATCH_QUERY_CONCURRENCY)
+    
+    print(f"\nBatch Query Results ({output_path}):")
+    print(f"  Questions: {summary['questions']} ({summary['errors']} errors, {summary['cached']} cached)")
+    print(f"  Elapsed: {summary['elapsed_s']:.1f}s, throughput {summary['throughput_qps']:.2f} questions/s")
+    print(f"  Latency: p50 {summary['latency_p50_ms'] / 1000:.1f}s, p95 {summary['latency_p95_ms'] / 1000:.1f}s, "
+          f"max {summary['latency_max_ms'] / 1000:.1f}s")
+    print(f"  Tokens: {summary['prompt_tokens']:,} prompt, {summary['completion_tokens']:,} completion")
+
 def main():
     parser = argparse.ArgumentParser(
         description="DBChat3 - Database Documentation RAG System"
@@ -292,6 +484,17 @@ def main():
         action="store_true",
         help="Process all SQL files and rebuild documentation"
     )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="With --process_database_files, insert each document into the RAG index as soon as it is generated"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="With --process_database_files or --run_pipeline, update the existing RAG index "
+             "with new, changed and removed documents instead of rebuilding it"
+    )
     parser.add_argument(
         "--run_pipeline",
         action="store_true",
@@ -302,31 +505,79 @@ def main():
         action="store_true",
         help="Interactive chat mode for querying database documentation"
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve queries over HTTP (SERVER_HOST:SERVER_PORT) with one shared RAG instance and per-client sessions"
+    )
+    parser.add_argument(
+        "--batch-query",
+        metavar="FILE",
+        help="Answer the questions in FILE (one per line, optionally prefixed with 'local:' etc.) "
+             "concurrently and write the results as JSONL"
+    )
+    parser.add_argument(
+        "--batch-output",
+        metavar="FILE",
+        help="With --batch-query, where to write the JSONL results (default: <FILE>_results.jsonl)"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug logging, including a per-step startup timing report"
+    )
     
     args = parser.parse_args()
     
     # If no arguments provided, show help
-    if not args.process_database_files and not args.run_pipeline and not args.chat:
+    if not (args.process_database_files or args.run_pipeline or args.chat or args.serve or args.batch_query):
         parser.print_help()
         return
     
+    if sum(map(bool, (args.chat, args.serve, args.batch_query))) > 1:
+        parser.error("--chat, --serve and --batch-query cannot be combined")
+    
+    if args.batch_output and not args.batch_query:
+        parser.error("--batch-output requires --batch-query")
+    
+    if args.pipelined and args.incremental:
+        parser.error("--pipelined cannot be combined with --incremental")
+    
+    configure_logging(debug=args.debug)
+    
     # Run the appropriate mode
     if args.process_database_files:
-        rag_manager, token_aggregator = asyncio.run(process_database_files())
+        rag_manager, token_aggregator = asyncio.run(
+            process_database_files(pipelined=args.pipelined, incremental=args.incremental)
+        )
         
-        # If chat mode also requested, continue with it
+        # If chat, server or batch query mode also requested, continue with it
         if args.chat:
             asyncio.run(chat_mode(rag_manager, token_aggregator))
+        elif args.serve:
+            asyncio.run(serve_mode(rag_manager, token_aggregator))
+        elif args.batch_query:
+            asyncio.run(batch_query_mode(args.batch_query, args.batch_output, rag_manager))
     
     elif args.run_pipeline:
-        rag_manager, token_aggregator = asyncio.run(run_pipeline())
+        rag_manager, token_aggregator = asyncio.run(run_pipeline(incremental=args.incremental))
         
-        # If chat mode also requested, continue with it
+        # If chat, server or batch query mode also requested, continue with it
         if args.chat:
             asyncio.run(chat_mode(rag_manager, token_aggregator))
+        elif args.serve:
+            asyncio.run(serve_mode(rag_manager, token_aggregator))
+        elif args.batch_query:
+            asyncio.run(batch_query_mode(args.batch_query, args.batch_output, rag_manager))
     
     elif args.chat:
         asyncio.run(chat_mode())
+    
+    elif args.serve:
+        asyncio.run(serve_mode())
+    
+    elif args.batch_query:
+        asyncio.run(batch_query_mode(args.batch_query, args.batch_output))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
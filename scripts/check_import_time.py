@@ -0,0 +1,82 @@
+"""Import-time regression guard for the DBChat3 CLI.
+
+Runs each check in a fresh interpreter and fails (exit code 1) if
+  - `python main.py --help` takes longer than the time budget (median of several runs),
+  - importing main or the src package loads a heavy dependency, or
+  - importing the RAG modules loads a provider SDK that is only needed by the other provider.
+
+Usage:
+    python scripts/check_import_time.py [--budget SECONDS] [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be loaded by the given import statement
+IMPORT_CHECKS = [
+    ("import main", ["lightrag", "neo4j", "pymongo", "openai", "ollama", "faiss", "numpy", "dotenv"]),
+    ("import src", ["lightrag", "neo4j", "pymongo", "openai", "ollama", "faiss", "numpy", "dotenv"]),
+    ("import src.rag_manager", ["openai", "ollama"]),
+    ("import src.documentation_processor", ["openai", "ollama", "lightrag"]),
+]
+
+
+def time_help(runs: int) -> float:
+    """Return the median wall time of `python main.py --help`"""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], cwd=PROJECT_ROOT,
+                       stdout=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def loaded_modules(statement: str, candidates: list) -> list:
+    """Return the candidate modules that are loaded after running the import statement"""
+    code = (f"import sys; {statement}; "
+            f"print(','.join(m for m in {candidates!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(",") if m] if output else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Guard against CLI import-time regressions")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Maximum median seconds for `python main.py --help` (default: 1.0)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of timed runs (default: 5)")
+    args = parser.parse_args()
+
+    failures = []
+
+    median = time_help(args.runs)
+    print(f"main.py --help: {median * 1000:.0f} ms median over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+    if median > args.budget:
+        failures.append(f"main.py --help took {median:.2f}s, budget is {args.budget:.2f}s")
+
+    for statement, forbidden in IMPORT_CHECKS:
+        loaded = loaded_modules(statement, forbidden)
+        print(f"{statement}: {'loads ' + ', '.join(loaded) if loaded else 'ok'}")
+        if loaded:
+            failures.append(f"'{statement}' eagerly loads {', '.join(loaded)}")
+
+    if failures:
+        print("\nImport-time check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\nImport-time check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Recall/latency report for the FAISS index types and vector encodings against the exact flat baseline.
+
+Loads the vectors of every FAISS storage in the working directory (entities,
+relationships, chunks) or, with --synthetic, a clustered random data set. It
+then builds each index type with every requested vector encoding, using the
+FAISS_* settings from .env, and reports per storage, index type and encoding:
+  - build time and serialized index size,
+  - recall@k against the flat index, and
+  - mean/p50/p95 single-query latency.
+
+Queries are stored vectors with small Gaussian noise, which approximates
+queries that are close to, but not identical to, indexed texts.
+
+Usage:
+    python scripts/faiss_benchmark.py [--top-k 10] [--queries 200] [--types flat hnsw ivf_pq]
+    python scripts/faiss_benchmark.py --types flat hnsw --encodings float32 float16 int8
+    python scripts/faiss_benchmark.py --synthetic 200000 --dim 768
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import faiss  # noqa: E402
+from src.config import Config  # noqa: E402
+from src.faiss_storage import (INDEX_TYPES, VECTOR_ENCODINGS, build_index, get_index_params,  # noqa: E402
+                                index_encoding_of, index_type_of)
+
+
+def load_storages(working_dir: Path) -> dict:
+    """Return {namespace: vectors} for every FAISS metadata file in the working directory"""
+    storages = {}
+    for meta_file in sorted(working_dir.rglob("faiss_index_*.index.meta.json")):
+        namespace = meta_file.name[len("faiss_index_"):-len(".index.meta.json")]
+        with open(meta_file, encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = [entry["__vector__"] for entry in meta.values() if "__vector__" in entry]
+        if vectors:
+            storages[namespace] = np.array(vectors, dtype=np.float32)
+    return storages
+
+
+def synthetic_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered, normalized random vectors (embeddings are far from uniform)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 1000), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), count)].copy()
+    queries += 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, index_types: list, encodings: list, top_k: int) -> list:
+    params = get_index_params()
+    dim = vectors.shape[1]
+
+    baseline = build_index("flat", dim, vectors, {**params, "encoding": "float32"})
+    _, expected = baseline.search(queries, top_k)
+
+    rows = []
+    for index_type in index_types:
+        # IVF-PQ stores PQ codes, so the vector encoding does not apply to it
+        for encoding in (encodings if index_type != "ivf_pq" else [None]):
+            rows.append(_benchmark_index(vectors, queries, expected, index_type, encoding, params, top_k))
+    return rows
+
+
+def _benchmark_index(vectors: np.ndarray, queries: np.ndarray, expected: np.ndarray, index_type: str,
+                     encoding, params: dict, top_k: int) -> dict:
+    start = time.perf_counter()
+    index = build_index(index_type, vectors.shape[1], vectors, {**params, "encoding": encoding or "float32"})
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    hits = 0
+    for query, truth in zip(queries, expected):
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), top_k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[0]) & set(truth[truth >= 0]))
+
+    possible = int((expected >= 0).sum())
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "type": index_type,
+        "encoding": encoding,
+        "built_as": (index_type_of(index), index_encoding_of(index) if encoding else None),
+        "build_s": build_seconds,
+        "size_mb": faiss.serialize_index(index).nbytes / 1024 / 1024,
+        "recall": hits / possible if possible else 1.0,
+        "mean_ms": latencies_ms.mean(),
+        "p50_ms": np.percentile(latencies_ms, 50),
+        "p95_ms": np.percentile(latencies_ms, 95),
+    }
+
+
+def print_report(name: str, vectors: np.ndarray, rows: list, top_k: int):
+    print(f"\n{name}: {len(vectors):,} vectors, dimension {vectors.shape[1]}")
+    print(f"  {'index':<8} {'encoding':<9} {'build s':>8} {'size MB':>9} {f'recall@{top_k}':>10} "
+          f"{'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    fallback = False
+    for row in rows:
+        label = row["type"]
+        if row["built_as"] != (row["type"], row["encoding"]):
+            label, fallback = f"{label}*", True
+        print(f"  {label:<8} {row['encoding'] or '-':<9} {row['build_s']:8.2f} {row['size_mb']:9.1f} "
+              f"{row['recall']:10.3f} {row['mean_ms']:8.3f} {row['p50_ms']:8.3f} {row['p95_ms']:8.3f}")
+    if fallback:
+        print(f"  * built as flat float32: fewer than FAISS_MIN_TRAIN_VECTORS={Config.FAISS_MIN_TRAIN_VECTORS} vectors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FAISS index types and encodings against the flat baseline")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--encodings", nargs="+", choices=VECTOR_ENCODINGS, default=[Config.FAISS_VECTOR_ENCODING],
+                        help="Vector encodings to compare for flat and HNSW indexes")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Benchmark this many synthetic vectors instead of the working directory")
+    parser.add_argument("--dim", type=int, default=Config.EMBEDDING_DIMENSION,
+                        help="Dimension of synthetic vectors")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        storages = {"synthetic": synthetic_vectors(args.synthetic, args.dim)}
+    else:
+        storages = load_storages(Config.WORKING_DIR)
+        if not storages:
+            print(f"No FAISS storages found in {Config.WORKING_DIR}; build the index first or use --synthetic N")
+            return 1
+
+    print(f"Settings: HNSW M={Config.FAISS_HNSW_M} efConstruction={Config.FAISS_HNSW_EF_CONSTRUCTION} "
+          f"efSearch={Config.FAISS_HNSW_EF_SEARCH}; IVF nlist={Config.FAISS_IVF_NLIST or 'auto'} "
+          f"nprobe={Config.FAISS_IVF_NPROBE}; PQ m={Config.FAISS_PQ_M or 'auto'} nbits={Config.FAISS_PQ_NBITS}")
+
+    for name, vectors in storages.items():
+        faiss.normalize_L2(vectors)
+        queries = make_queries(vectors, args.queries)
+        rows = benchmark(vectors, queries, args.types, args.encodings, min(args.top_k, len(vectors)))
+        print_report(name, vectors, rows, args.top_k)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
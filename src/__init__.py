@@ -3,12 +3,23 @@ DBChat3 - Database Documentation RAG System
 
 This package provides tools for generating comprehensive database documentation
 using Azure OpenAI and enabling intelligent querying through LightRAG.
+
+Public names are imported lazily on first access, so importing the package (or
+running `main.py --help`) does not load LightRAG, the database drivers or the
+LLM provider SDKs.
 """
 
-from .config import Config
-from .azure_client import AzureOpenAIClient
-from .documentation_processor import DocumentationProcessor
-from .rag_manager import RAGManager, azure_llm_callback, embedding_func
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_IMPORTS = {
+    'Config': '.config',
+    'AzureOpenAIClient': '.azure_client',
+    'DocumentationProcessor': '.documentation_processor',
+    'RAGManager': '.rag_manager',
+    'azure_llm_callback': '.rag_manager',
+    'embedding_func': '.rag_manager',
+}
 
 __all__ = [
     'Config',
@@ -19,4 +30,15 @@ __all__ = [
     'embedding_func'
 ]
 
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value  # Cache so later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
\ No newline at end of file
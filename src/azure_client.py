@@ -3,6 +3,7 @@ import threading
 from openai import RateLimitError, APIConnectionError, APITimeoutError
 from .config import Config
 from .azure_factory import get_chat_client, get_embedding_client
+from .response_cache import ResponseCache, get_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +19,20 @@ class AzureOpenAIClient:
             "completion_tokens": 0
         }
         self._token_lock = threading.Lock()
+        # Persistent response cache shared by all documentation clients
+        self.response_cache = get_response_cache()
         logger.info("Initialized Azure OpenAI clients")
     
     def generate_documentation(self, content: str, system_prompt: str) -> str:
-        """Generate documentation for SQL content"""
+        """Generate documentation for SQL content, served from the response cache when possible"""
+        cache_key = None
+        if self.response_cache:
+            cache_key = ResponseCache.make_key("azure", Config.AZURE_OPENAI_DEPLOYMENT, system_prompt, content.strip())
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Documentation served from response cache")
+                return cached
+        
         try:
             messages = [
                 {"role": "system", "content": system_prompt},
@@ -44,7 +55,11 @@ class AzureOpenAIClient:
                     self.token_usage["completion_tokens"] += response.usage.completion_tokens
                 logger.debug(f"Documentation generation used {response.usage.total_tokens} tokens")
             
-            return response.choices[0].message.content
+            documentation = response.choices[0].message.content
+            if cache_key and documentation:
+                self.response_cache.put(cache_key, documentation, {"model": Config.AZURE_OPENAI_DEPLOYMENT})
+            
+            return documentation
             
         except (RateLimitError, APIConnectionError, APITimeoutError) as e:
             logger.error(f"Azure OpenAI API error in generate_documentation: {e}")
@@ -58,6 +73,17 @@ class AzureOpenAIClient:
         with self._token_lock:
             return self.token_usage.copy()
     
+    def get_cache_stats(self) -> dict:
+        """Get response cache statistics (empty if caching is disabled)"""
+        if self.response_cache:
+            return self.response_cache.get_stats()
+        return {}
+    
+    def reset_cache_stats(self):
+        """Reset response cache statistics"""
+        if self.response_cache:
+            self.response_cache.reset_stats()
+    
     def reset_token_usage(self):
         """Reset token usage statistics"""
         with self._token_lock:
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from openai import AzureOpenAI, AuthenticationError, APIConnectionError
+from openai import AzureOpenAI, AsyncAzureOpenAI, AuthenticationError, APIConnectionError
 from .config import Config
 
 logger = logging.getLogger(__name__)
@@ -8,6 +9,12 @@ logger = logging.getLogger(__name__)
 _chat_client = None
 _embedding_client = None
 
+# Global shared async clients - reused within the event loop that created them
+_async_chat_client = None
+_async_chat_client_loop = None
+_async_embedding_client = None
+_async_embedding_client_loop = None
+
 def get_chat_client():
     """Get shared Azure OpenAI chat client. Creates it once, then reuses it."""
     global _chat_client
@@ -62,4 +69,66 @@ def get_embedding_client():
             logger.error(f"Unexpected error creating Azure OpenAI embedding client: {e}")
             raise RuntimeError(f"Failed to create Azure OpenAI embedding client: {e}")
     
-    return _embedding_client
\ No newline at end of file
+    return _embedding_client
+
+def get_async_chat_client():
+    """Get shared async Azure OpenAI chat client for the running event loop.
+    
+    The underlying HTTP connection pool is bound to the event loop it was created
+    in, so a new client is created when called from a different loop (for example
+    a later asyncio.run call in main.py).
+    """
+    global _async_chat_client, _async_chat_client_loop
+    
+    loop = asyncio.get_running_loop()
+    if _async_chat_client is None or _async_chat_client_loop is not loop:
+        try:
+            _async_chat_client = AsyncAzureOpenAI(
+                api_version=Config.AZURE_OPENAI_API_VERSION,
+                azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
+                api_key=Config.AZURE_OPENAI_API_KEY
+            )
+            _async_chat_client_loop = loop
+            logger.info("Created shared async Azure OpenAI chat client")
+            
+        except AuthenticationError as e:
+            logger.error(f"Azure OpenAI authentication failed for async chat client: {e}")
+            raise ValueError(f"Invalid Azure OpenAI credentials for async chat client: {e}")
+        except APIConnectionError as e:
+            logger.error(f"Azure OpenAI connection failed for async chat client: {e}")
+            raise ConnectionError(f"Cannot connect to Azure OpenAI for async chat client: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error creating async Azure OpenAI chat client: {e}")
+            raise RuntimeError(f"Failed to create async Azure OpenAI chat client: {e}")
+    
+    return _async_chat_client
+
+def get_async_embedding_client():
+    """Get shared async Azure OpenAI embedding client for the running event loop.
+    
+    See get_async_chat_client for why the client is tied to the event loop.
+    """
+    global _async_embedding_client, _async_embedding_client_loop
+    
+    loop = asyncio.get_running_loop()
+    if _async_embedding_client is None or _async_embedding_client_loop is not loop:
+        try:
+            _async_embedding_client = AsyncAzureOpenAI(
+                api_key=Config.AZURE_OPENAI_API_KEY,
+                api_version=Config.AZURE_EMBEDDING_API_VERSION,
+                azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
+            )
+            _async_embedding_client_loop = loop
+            logger.info("Created shared async Azure OpenAI embedding client")
+            
+        except AuthenticationError as e:
+            logger.error(f"Azure OpenAI authentication failed for async embedding client: {e}")
+            raise ValueError(f"Invalid Azure OpenAI credentials for async embedding client: {e}")
+        except APIConnectionError as e:
+            logger.error(f"Azure OpenAI connection failed for async embedding client: {e}")
+            raise ConnectionError(f"Cannot connect to Azure OpenAI for async embedding client: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error creating async Azure OpenAI embedding client: {e}")
+            raise RuntimeError(f"Failed to create async Azure OpenAI embedding client: {e}")
+    
+    return _async_embedding_client
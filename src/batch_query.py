@@ -0,0 +1,91 @@
+"""Batch querying: answer a file of questions concurrently and write JSONL results."""
+
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUERY_MODES = ("naive", "local", "global", "hybrid")
+
+
+def load_questions(path: Path, default_mode: str = "hybrid") -> List[Tuple[int, str, str]]:
+    """Read questions, one per line, optionally prefixed with a mode ("local: ...")
+
+    Blank lines and lines starting with # are skipped.
+
+    Returns:
+        List of (line number, mode, question) tuples
+    """
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            mode, separator, question = line.partition(":")
+            if separator and mode.strip().lower() in QUERY_MODES and question.strip():
+                questions.append((line_number, mode.strip().lower(), question.strip()))
+            else:
+                questions.append((line_number, default_mode, line))
+    return questions
+
+
+async def run_batch(rag_manager, questions: List[Tuple[int, str, str]], output_path: Path,
+                    concurrency: int) -> Dict[str, Any]:
+    """Answer questions with at most `concurrency` in flight, writing one JSON record per answer
+
+    Records are written as answers complete, so they are in completion order;
+    each carries the line number of its question.
+
+    Returns:
+        Summary with question and error counts, wall time, throughput,
+        latency percentiles and token totals
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    records = []
+
+    async def answer(line_number: int, mode: str, question: str, out):
+        async with semaphore:
+            result = await rag_manager.query_with_stats(question, mode)
+        tokens = result["tokens"]
+        record = {
+            "line": line_number,
+            "mode": mode,
+            "query": question,
+            "answer": result["answer"],
+            "error": result["error"] is not None,
+            "latency_ms": round(result["latency_ms"], 1),
+            "prompt_tokens": tokens.get("prompt_tokens", 0),
+            "completion_tokens": tokens.get("completion_tokens", 0),
+            "cached": result["cached"],
+            "coalesced": result["coalesced"],
+        }
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        records.append(record)
+        logger.info(f"Answered {len(records)}/{len(questions)} (line {line_number}, {mode}) "
+                    f"in {result['latency_ms']:.0f} ms")
+
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out:
+        await asyncio.gather(*[answer(line_number, mode, question, out) for line_number, mode, question in questions])
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([record["latency_ms"] for record in records]) if records else np.zeros(1)
+    return {
+        "questions": len(records),
+        "errors": sum(record["error"] for record in records),
+        "cached": sum(record["cached"] for record in records),
+        "elapsed_s": elapsed,
+        "throughput_qps": len(records) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "latency_max_ms": float(latencies.max()),
+        "prompt_tokens": sum(record["prompt_tokens"] for record in records),
+        "completion_tokens": sum(record["completion_tokens"] for record in records),
+    }
@@ -26,6 +26,7 @@ def clear_dbchat3_env_vars():
         'OLLAMA_EMBEDDING_MODEL',
         'OLLAMA_TIMEOUT',
         'OLLAMA_NUM_CTX',
+        'OLLAMA_KEEP_ALIVE',
         
         # Neo4j
         'NEO4J_URI',
@@ -33,6 +34,7 @@ def clear_dbchat3_env_vars():
         'NEO4J_PASSWORD',
         'NEO4J_DATABASE',
         'NEO4J_WORKSPACE',
+        'NEO4J_MAX_CONNECTION_POOL_SIZE',
         
         # MongoDB
         'MONGO_USER',
@@ -40,6 +42,8 @@ def clear_dbchat3_env_vars():
         'MONGO_URI',
         'MONGO_DATABASE',
         'MONGODB_WORKSPACE',
+        'MONGO_MAX_POOL_SIZE',
+        'MONGO_MIN_POOL_SIZE',
         
         # Model Settings
         'EMBEDDING_DIMENSION',
@@ -50,6 +54,72 @@ def clear_dbchat3_env_vars():
         # Token Tracking
         'ENABLE_TOKEN_TRACKING',
         'SHOW_TOKEN_USAGE_IN_CHAT',
+        
+        # Performance
+        'DOC_GENERATION_WORKERS',
+        'PIPELINE_QUEUE_SIZE',
+        'INSERT_BATCH_SIZE',
+        'INSERT_MAX_PARALLEL',
+        'LLM_MAX_ASYNC',
+        'EMBEDDING_MAX_ASYNC',
+        
+        # Response Cache
+        'RESPONSE_CACHE_ENABLED',
+        'RESPONSE_CACHE_DIR',
+        'RESPONSE_CACHE_MAX_MB',
+        
+        # Keyword Extraction Cache
+        'KEYWORD_CACHE_ENABLED',
+        'KEYWORD_CACHE_DIR',
+        'KEYWORD_CACHE_MAX_MB',
+        
+        # Embedding Cache
+        'EMBEDDING_CACHE_ENABLED',
+        'EMBEDDING_CACHE_DIR',
+        'EMBEDDING_CACHE_MAX_ENTRIES',
+        
+        # Query Answer Cache
+        'QUERY_CACHE_ENABLED',
+        'QUERY_CACHE_MAX_ENTRIES',
+        'QUERY_CACHE_TTL_SECONDS',
+        'QUERY_CACHE_SIMILARITY_THRESHOLD',
+        
+        # Conversation History
+        'HISTORY_MAX_TOKENS',
+        'HISTORY_KEEP_TURNS',
+        'HISTORY_COMPACTION',
+        
+        # Query Server
+        'SERVER_HOST',
+        'SERVER_PORT',
+        'SERVER_MAX_SESSIONS',
+        'SERVER_SESSION_TTL_SECONDS',
+        
+        # Batch Queries
+        'BATCH_QUERY_CONCURRENCY',
+        
+        # Startup Warm-up
+        'WARMUP_ENABLED',
+        'WARMUP_QUERIES_FILE',
+        
+        # Embedding Request Batching
+        'EMBEDDING_BATCH_MAX_SIZE',
+        'EMBEDDING_BATCH_WAIT_MS',
+        'EMBEDDING_BATCH_MAX_TOKENS',
+        'EMBEDDING_BATCH_CONCURRENCY',
+        
+        # FAISS Vector Index
+        'FAISS_INDEX_TYPE',
+        'FAISS_VECTOR_ENCODING',
+        'FAISS_HNSW_M',
+        'FAISS_HNSW_EF_CONSTRUCTION',
+        'FAISS_HNSW_EF_SEARCH',
+        'FAISS_IVF_NLIST',
+        'FAISS_IVF_NPROBE',
+        'FAISS_PQ_M',
+        'FAISS_PQ_NBITS',
+        'FAISS_MIN_TRAIN_VECTORS',
+        'FAISS_RETRAIN_GROWTH',
     ]
     
     cleared_vars = []
@@ -88,6 +158,7 @@ class Config:
     OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text:latest")
     OLLAMA_TIMEOUT = os.getenv("OLLAMA_TIMEOUT", "300")
     OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "32768"))
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # How long models stay loaded after a RAG request
     
     # Neo4j settings
     NEO4J_URI = os.getenv("NEO4J_URI", "neo4j://localhost:7687")
@@ -95,6 +166,7 @@ class Config:
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
     NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
     NEO4J_WORKSPACE = os.getenv("NEO4J_WORKSPACE")
+    NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "100"))  # Also read by LightRAG's Neo4j storage
     
     # MongoDB settings
     MONGO_USER = os.getenv("MONGO_USER")
@@ -102,11 +174,15 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
     MONGO_DATABASE = os.getenv("MONGO_DATABASE", "LightRAG")
     MONGODB_WORKSPACE = os.getenv("MONGODB_WORKSPACE")
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
     
     # Directories
     DATABASE_FILES_DIR = Path("database_files")
     WORKING_DIR = Path("working_dir")
     LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
+    DOC_MANIFEST_FILE = DATABASE_FILES_DIR / ".doc_manifest.json"
+    INDEX_MANIFEST_FILE = WORKING_DIR / ".index_manifest.json"
     
     # Model settings
     EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "768"))  # Azure: 1536/3072, Ollama nomic-embed-text: 768
@@ -115,6 +191,86 @@ class Config:
     ENABLE_TOKEN_TRACKING = os.getenv("ENABLE_TOKEN_TRACKING", "true").lower() == "true"
     SHOW_TOKEN_USAGE_IN_CHAT = os.getenv("SHOW_TOKEN_USAGE_IN_CHAT", "true").lower() == "true"
     
+    # Performance settings
+    DOC_GENERATION_WORKERS = int(os.getenv("DOC_GENERATION_WORKERS", "1"))  # 1 = sequential generation
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))  # Docs buffered between generation and ingestion
+    INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", "1"))  # Docs per LightRAG ainsert call
+    INSERT_MAX_PARALLEL = int(os.getenv("INSERT_MAX_PARALLEL", "2"))  # Docs LightRAG processes concurrently
+    LLM_MAX_ASYNC = int(os.getenv("LLM_MAX_ASYNC", "4"))  # Concurrent LLM calls issued by LightRAG
+    EMBEDDING_MAX_ASYNC = int(os.getenv("EMBEDDING_MAX_ASYNC", "8"))  # Concurrent embedding calls issued by LightRAG
+    
+    # Response cache settings
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", ".cache/llm_responses"))
+    RESPONSE_CACHE_MAX_MB = int(os.getenv("RESPONSE_CACHE_MAX_MB", "512"))
+    
+    # Keyword extraction cache settings (query keywords do not depend on the index, so it survives rebuilds)
+    KEYWORD_CACHE_ENABLED = os.getenv("KEYWORD_CACHE_ENABLED", "true").lower() == "true"
+    KEYWORD_CACHE_DIR = Path(os.getenv("KEYWORD_CACHE_DIR", ".cache/keywords"))
+    KEYWORD_CACHE_MAX_MB = int(os.getenv("KEYWORD_CACHE_MAX_MB", "32"))
+    
+    # Embedding cache settings
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings"))
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+    
+    # Query answer cache settings (in memory, cleared whenever the index changes)
+    QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true"
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1000"))
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))  # 0 = no expiry
+    QUERY_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("QUERY_CACHE_SIMILARITY_THRESHOLD", "0"))  # 0 = exact matches only
+    
+    # Chat conversation history settings (older turns are summarized or dropped to stay within budget)
+    HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "2000"))  # Estimated tokens of history per query
+    HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "3"))  # Most recent turns always kept verbatim
+    HISTORY_COMPACTION = os.getenv("HISTORY_COMPACTION", "summarize").lower()  # summarize or drop
+    
+    # HTTP query server settings (main.py --serve)
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "1000"))  # Least recently used sessions are evicted
+    SERVER_SESSION_TTL_SECONDS = float(os.getenv("SERVER_SESSION_TTL_SECONDS", "3600"))  # Idle expiry, 0 = never
+    
+    # Batch query settings (main.py --batch-query)
+    BATCH_QUERY_CONCURRENCY = int(os.getenv("BATCH_QUERY_CONCURRENCY", "4"))  # Questions answered at once
+    
+    # Warm-up before the first query of --chat, --serve and --batch-query
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+    WARMUP_QUERIES_FILE = os.getenv("WARMUP_QUERIES_FILE", "")  # Priming questions, same format as --batch-query
+    
+    # Embedding request batching settings
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))  # Texts per provider call
+    EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "10"))  # 0 = no coalescing
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))  # Estimated tokens per provider call, all texts
+    EMBEDDING_BATCH_CONCURRENCY = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))  # Provider calls in flight
+    
+    # FAISS vector index settings
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()  # flat, hnsw or ivf_pq
+    FAISS_VECTOR_ENCODING = os.getenv("FAISS_VECTOR_ENCODING", "float32").lower()  # float32, float16 or int8
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))  # Graph neighbours per node
+    FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+    FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "128"))
+    FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = 4 * sqrt(vectors)
+    FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+    FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "0"))  # 0 = largest divisor of the dimension up to 64
+    FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+    FAISS_MIN_TRAIN_VECTORS = int(os.getenv("FAISS_MIN_TRAIN_VECTORS", "10000"))  # IVF-PQ and int8 stay flat below this
+    FAISS_RETRAIN_GROWTH = float(os.getenv("FAISS_RETRAIN_GROWTH", "2"))  # Retrain after this growth factor, 0 = never
+    
+    @classmethod
+    def get_llm_model(cls) -> str:
+        """Return the chat model (Azure deployment or Ollama model) of the active provider"""
+        if cls.LLM_PROVIDER == "azure":
+            return cls.AZURE_OPENAI_DEPLOYMENT
+        return cls.OLLAMA_LLM_MODEL
+    
+    @classmethod
+    def get_embedding_model(cls) -> str:
+        """Return the embedding model (Azure deployment or Ollama model) of the active provider"""
+        if cls.LLM_PROVIDER == "azure":
+            return cls.AZURE_EMBEDDING_DEPLOYMENT
+        return cls.OLLAMA_EMBEDDING_MODEL
+    
     @classmethod
     def validate_azure_config(cls):
         """Validate required Azure OpenAI configuration"""
@@ -153,6 +309,11 @@ class Config:
                 f"Must use one of these schemes: {', '.join(valid_schemes)}\n"
                 f"Example: neo4j://localhost:7687 or bolt://localhost:7687"
             )
+        
+        if cls.NEO4J_MAX_CONNECTION_POOL_SIZE < 1:
+            raise ValueError(
+                f"NEO4J_MAX_CONNECTION_POOL_SIZE must be at least 1, got {cls.NEO4J_MAX_CONNECTION_POOL_SIZE}"
+            )
     
     @classmethod
     def validate_mongo_config(cls):
@@ -178,6 +339,13 @@ class Config:
                 "This defines which MongoDB database to use for storage.\n"
                 "Default value is 'LightRAG' if not set."
             )
+        
+        if cls.MONGO_MAX_POOL_SIZE < 1 or not 0 <= cls.MONGO_MIN_POOL_SIZE <= cls.MONGO_MAX_POOL_SIZE:
+            raise ValueError(
+                f"Invalid MongoDB pool sizes: MONGO_MIN_POOL_SIZE={cls.MONGO_MIN_POOL_SIZE}, "
+                f"MONGO_MAX_POOL_SIZE={cls.MONGO_MAX_POOL_SIZE}\n"
+                "MONGO_MAX_POOL_SIZE must be at least 1 and MONGO_MIN_POOL_SIZE between 0 and MONGO_MAX_POOL_SIZE."
+            )
     
     @classmethod
     def validate_ollama_config(cls):
@@ -203,6 +371,126 @@ class Config:
                 "Make sure this model is pulled in your Ollama server."
             )
     
+    @classmethod
+    def validate_performance_config(cls):
+        """Validate performance tuning configuration"""
+        if cls.DOC_GENERATION_WORKERS < 1:
+            raise ValueError(
+                f"DOC_GENERATION_WORKERS must be at least 1, got {cls.DOC_GENERATION_WORKERS}\n"
+                "Use 1 for sequential documentation generation or a higher value\n"
+                "to generate documentation for several SQL files in parallel."
+            )
+        
+        if cls.PIPELINE_QUEUE_SIZE < 1:
+            raise ValueError(
+                f"PIPELINE_QUEUE_SIZE must be at least 1, got {cls.PIPELINE_QUEUE_SIZE}\n"
+                "This bounds how many generated documents wait for RAG ingestion in --pipelined mode."
+            )
+        
+        for name in ('INSERT_BATCH_SIZE', 'INSERT_MAX_PARALLEL', 'LLM_MAX_ASYNC', 'EMBEDDING_MAX_ASYNC'):
+            if getattr(cls, name) < 1:
+                raise ValueError(f"{name} must be at least 1, got {getattr(cls, name)}")
+        
+        if cls.RESPONSE_CACHE_ENABLED and cls.RESPONSE_CACHE_MAX_MB < 1:
+            raise ValueError(
+                f"RESPONSE_CACHE_MAX_MB must be at least 1, got {cls.RESPONSE_CACHE_MAX_MB}\n"
+                "Set RESPONSE_CACHE_ENABLED=false to disable the response cache instead."
+            )
+        
+        if cls.KEYWORD_CACHE_ENABLED and cls.KEYWORD_CACHE_MAX_MB < 1:
+            raise ValueError(
+                f"KEYWORD_CACHE_MAX_MB must be at least 1, got {cls.KEYWORD_CACHE_MAX_MB}\n"
+                "Set KEYWORD_CACHE_ENABLED=false to disable the keyword cache instead."
+            )
+        
+        if cls.EMBEDDING_CACHE_ENABLED and cls.EMBEDDING_CACHE_MAX_ENTRIES < 1:
+            raise ValueError(
+                f"EMBEDDING_CACHE_MAX_ENTRIES must be at least 1, got {cls.EMBEDDING_CACHE_MAX_ENTRIES}\n"
+                "Set EMBEDDING_CACHE_ENABLED=false to disable the embedding cache instead."
+            )
+        
+        if cls.QUERY_CACHE_ENABLED:
+            if cls.QUERY_CACHE_MAX_ENTRIES < 1:
+                raise ValueError(
+                    f"QUERY_CACHE_MAX_ENTRIES must be at least 1, got {cls.QUERY_CACHE_MAX_ENTRIES}\n"
+                    "Set QUERY_CACHE_ENABLED=false to disable the query cache instead."
+                )
+            if cls.QUERY_CACHE_TTL_SECONDS < 0:
+                raise ValueError(
+                    f"QUERY_CACHE_TTL_SECONDS must not be negative, got {cls.QUERY_CACHE_TTL_SECONDS}\n"
+                    "Use 0 to keep cached answers until the index changes."
+                )
+            if not 0 <= cls.QUERY_CACHE_SIMILARITY_THRESHOLD <= 1:
+                raise ValueError(
+                    f"QUERY_CACHE_SIMILARITY_THRESHOLD must be between 0 and 1, got {cls.QUERY_CACHE_SIMILARITY_THRESHOLD}\n"
+                    "Use 0 for exact matches only, or a value such as 0.95 to also serve paraphrased queries."
+                )
+        
+        if cls.HISTORY_MAX_TOKENS < 1:
+            raise ValueError(f"HISTORY_MAX_TOKENS must be at least 1, got {cls.HISTORY_MAX_TOKENS}")
+        if cls.HISTORY_KEEP_TURNS < 0:
+            raise ValueError(f"HISTORY_KEEP_TURNS must not be negative, got {cls.HISTORY_KEEP_TURNS}")
+        if cls.HISTORY_COMPACTION not in ("summarize", "drop"):
+            raise ValueError(
+                f"Invalid HISTORY_COMPACTION: {cls.HISTORY_COMPACTION}\n"
+                "Use 'summarize' to fold older turns into a summary or 'drop' to forget them."
+            )
+        
+        if not 1 <= cls.SERVER_PORT <= 65535:
+            raise ValueError(f"SERVER_PORT must be between 1 and 65535, got {cls.SERVER_PORT}")
+        if cls.SERVER_MAX_SESSIONS < 1:
+            raise ValueError(f"SERVER_MAX_SESSIONS must be at least 1, got {cls.SERVER_MAX_SESSIONS}")
+        if cls.SERVER_SESSION_TTL_SECONDS < 0:
+            raise ValueError(
+                f"SERVER_SESSION_TTL_SECONDS must not be negative, got {cls.SERVER_SESSION_TTL_SECONDS}\n"
+                "Use 0 to keep idle sessions until they are evicted by SERVER_MAX_SESSIONS."
+            )
+        
+        if cls.BATCH_QUERY_CONCURRENCY < 1:
+            raise ValueError(f"BATCH_QUERY_CONCURRENCY must be at least 1, got {cls.BATCH_QUERY_CONCURRENCY}")
+        
+        if cls.WARMUP_ENABLED and cls.WARMUP_QUERIES_FILE and not Path(cls.WARMUP_QUERIES_FILE).is_file():
+            raise ValueError(
+                f"WARMUP_QUERIES_FILE not found: {cls.WARMUP_QUERIES_FILE}\n"
+                "Leave it empty to warm up without priming queries."
+            )
+        
+        for name in ('EMBEDDING_BATCH_MAX_SIZE', 'EMBEDDING_BATCH_MAX_TOKENS', 'EMBEDDING_BATCH_CONCURRENCY'):
+            if getattr(cls, name) < 1:
+                raise ValueError(f"{name} must be at least 1, got {getattr(cls, name)}")
+        
+        if cls.EMBEDDING_BATCH_WAIT_MS < 0:
+            raise ValueError(
+                f"EMBEDDING_BATCH_WAIT_MS must not be negative, got {cls.EMBEDDING_BATCH_WAIT_MS}\n"
+                "Use 0 to send every embedding request to the provider immediately."
+            )
+        
+        if cls.FAISS_INDEX_TYPE not in ('flat', 'hnsw', 'ivf_pq'):
+            raise ValueError(
+                f"FAISS_INDEX_TYPE '{cls.FAISS_INDEX_TYPE}' is not supported\n"
+                "Use 'flat' (exact search), 'hnsw' or 'ivf_pq'."
+            )
+        
+        if cls.FAISS_VECTOR_ENCODING not in ('float32', 'float16', 'int8'):
+            raise ValueError(
+                f"FAISS_VECTOR_ENCODING '{cls.FAISS_VECTOR_ENCODING}' is not supported\n"
+                "Use 'float32' (exact), 'float16' or 'int8' (scalar quantization)."
+            )
+        
+        for name in ('FAISS_HNSW_M', 'FAISS_HNSW_EF_CONSTRUCTION', 'FAISS_HNSW_EF_SEARCH',
+                     'FAISS_IVF_NPROBE', 'FAISS_PQ_NBITS', 'FAISS_MIN_TRAIN_VECTORS'):
+            if getattr(cls, name) < 1:
+                raise ValueError(f"{name} must be at least 1, got {getattr(cls, name)}")
+        
+        if cls.FAISS_IVF_NLIST < 0 or cls.FAISS_PQ_M < 0:
+            raise ValueError("FAISS_IVF_NLIST and FAISS_PQ_M must be 0 (automatic) or positive")
+        
+        if cls.FAISS_RETRAIN_GROWTH != 0 and cls.FAISS_RETRAIN_GROWTH <= 1:
+            raise ValueError(
+                f"FAISS_RETRAIN_GROWTH must be greater than 1, got {cls.FAISS_RETRAIN_GROWTH}\n"
+                "Use 0 to keep the first training of ivf_pq and int8 indexes."
+            )
+    
     @classmethod
     def validate_all_config(cls):
         """Validate all configuration"""
@@ -233,6 +521,11 @@ class Config:
         except ValueError as e:
             errors.append(f"MongoDB Configuration:\n{str(e)}")
         
+        try:
+            cls.validate_performance_config()
+        except ValueError as e:
+            errors.append(f"Performance Configuration:\n{str(e)}")
+        
         # If there are any errors, raise them all together
         if errors:
             raise ValueError("\n\n".join(errors))
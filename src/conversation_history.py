@@ -0,0 +1,137 @@
+"""Chat conversation history kept within a token budget."""
+
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (previous summary, turns to fold in, word limit, token_tracker=...) -> new summary
+Summarizer = Callable[..., Awaitable[str]]
+
+
+class ConversationHistory:
+    """Question/answer turns of a chat session, compacted to stay within a token budget.
+
+    The most recent keep_turns turns are always kept verbatim. Once the history
+    exceeds max_tokens, older turns are folded into a rolling summary by the
+    summarize function, or dropped oldest first if there is none (or it fails).
+    When the recent turns alone exceed the budget, their answers are shortened
+    instead, since no summary would fit next to them.
+    The summary is presented to LightRAG as the first turn of the history, so
+    prompt size stays roughly constant however long the session runs.
+    """
+
+    CHARS_PER_TOKEN = 3  # Conservative estimate for SQL identifiers and prose
+    SUMMARY_QUESTION = "What have we discussed so far?"
+    MIN_SUMMARY_TOKENS = 50  # Below this there is no room left for a useful summary
+    TRUNCATION_MARKER = " [...]"
+
+    def __init__(self, max_tokens: int, keep_turns: int, summarize: Optional[Summarizer] = None):
+        """Initialize an empty history.
+
+        Args:
+            max_tokens: Estimated token budget for the history passed to each query
+            keep_turns: Number of most recent turns that are never compacted
+            summarize: Optional async function producing the rolling summary
+        """
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarize = summarize
+        self.turns: List[Tuple[str, str]] = []
+        self.summary = ""
+        self._stats = {"summarized_turns": 0, "dropped_turns": 0, "summaries": 0, "shortened_answers": 0}
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        return len(text) // cls.CHARS_PER_TOKEN + 1
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Return the history as LightRAG conversation_history messages"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "user", "content": self.SUMMARY_QUESTION})
+            messages.append({"role": "assistant", "content": self.summary})
+        for question, answer in self.turns:
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+        return messages
+
+    def token_count(self) -> int:
+        """Estimated tokens of the history as passed to a query"""
+        return sum(self.estimate_tokens(message["content"]) for message in self.messages())
+
+    async def add_turn(self, question: str, answer: str, token_tracker=None):
+        """Append a completed turn and compact the history if it exceeds the budget
+
+        Args:
+            token_tracker: Optional tracker the tokens of a summary call are added to,
+                so they are attributed to the turn that caused the compaction
+        """
+        self.turns.append((question, answer))
+        if self.token_count() > self.max_tokens:
+            await self._compact(token_tracker)
+
+    def _tokens_of(self, turns: List[Tuple[str, str]]) -> int:
+        return sum(self.estimate_tokens(question) + self.estimate_tokens(answer) for question, answer in turns)
+
+    async def _compact(self, token_tracker=None):
+        foldable = max(0, len(self.turns) - self.keep_turns)
+        kept_tokens = self._tokens_of(self.turns[foldable:])
+        # Budget left for the summary once the recent turns are kept verbatim
+        summary_budget = self.max_tokens - kept_tokens - self.estimate_tokens(self.SUMMARY_QUESTION)
+
+        if foldable and self.summarize and summary_budget >= self.MIN_SUMMARY_TOKENS:
+            old_turns = self.turns[:foldable]
+            max_words = summary_budget // 2  # Roughly two estimated tokens per word
+            try:
+                summary = (await self.summarize(self.summary, old_turns, max_words,
+                                                token_tracker=token_tracker)).strip()
+            except Exception as e:
+                logger.warning(f"Conversation summary failed, dropping old turns instead: {e}")
+            else:
+                # The model may overrun the word limit; cut the summary to fit rather than lose it
+                self.summary = self._truncate(summary, summary_budget)
+                self.turns = self.turns[foldable:]
+                self._stats["summarized_turns"] += foldable
+                self._stats["summaries"] += 1
+                logger.info(f"Folded {foldable} conversation turns into the history summary "
+                            f"({self.token_count()} tokens of history)")
+                return
+
+        # Drop the oldest turns, then the previous summary, until only the recent turns remain
+        while self.token_count() > self.max_tokens and len(self.turns) > self.keep_turns:
+            self.turns.pop(0)
+            self._stats["dropped_turns"] += 1
+        if self.token_count() > self.max_tokens:
+            self.summary = ""
+        # Recent turns that exceed the budget on their own are shortened, oldest answer first
+        for i, (question, answer) in enumerate(self.turns):
+            excess = self.token_count() - self.max_tokens
+            if excess <= 0:
+                break
+            self.turns[i] = (question, self._truncate(answer, self.estimate_tokens(answer) - excess))
+            self._stats["shortened_answers"] += 1
+        logger.info(f"Conversation history compacted to {len(self.turns)} turns ({self.token_count()} tokens)")
+
+    @classmethod
+    def _truncate(cls, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens estimated tokens, marking the cut"""
+        if cls.estimate_tokens(text) <= max_tokens:
+            return text
+        max_chars = max(0, (max_tokens - 1) * cls.CHARS_PER_TOKEN - len(cls.TRUNCATION_MARKER))
+        return text[:max_chars].rstrip() + cls.TRUNCATION_MARKER
+
+    def clear(self):
+        """Forget all turns and the summary"""
+        self.turns = []
+        self.summary = ""
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get compaction statistics and the current history size"""
+        stats = self._stats.copy()
+        stats["turns"] = len(self.turns)
+        stats["tokens"] = self.token_count()
+        return stats
+
+    def __len__(self) -> int:
+        return len(self.turns)
@@ -0,0 +1,105 @@
+import atexit
+import logging
+import threading
+from typing import Optional
+from urllib.parse import quote_plus
+from neo4j import GraphDatabase, Driver
+from pymongo import MongoClient
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Singleton instances - one pooled connection per database and process
+_neo4j_driver: Optional[Driver] = None
+_mongo_client: Optional[MongoClient] = None
+_lock = threading.Lock()
+
+def build_mongo_uri() -> str:
+    """Build MongoDB URI, handling cases where credentials are already in URI or need to be added"""
+    base_uri = Config.MONGO_URI
+
+    # Check if URI already contains credentials (has @ symbol)
+    if '@' in base_uri:
+        # URI already contains credentials, use as-is
+        logger.debug("Using MongoDB URI with embedded credentials")
+        return base_uri
+
+    # URI doesn't contain credentials, add them if available
+    if Config.MONGO_USER and Config.MONGO_PASS:
+        # Properly escape credentials
+        escaped_user = quote_plus(Config.MONGO_USER)
+        escaped_pass = quote_plus(Config.MONGO_PASS)
+
+        # Remove mongodb:// prefix, add credentials, then re-add prefix
+        uri_without_scheme = base_uri.replace('mongodb://', '').replace('mongodb+srv://', '')
+        scheme = 'mongodb+srv://' if base_uri.startswith('mongodb+srv://') else 'mongodb://'
+
+        mongo_uri = f"{scheme}{escaped_user}:{escaped_pass}@{uri_without_scheme}"
+        logger.debug("Built MongoDB URI with separate user/pass credentials")
+        return mongo_uri
+    else:
+        # No credentials provided, use URI as-is
+        logger.debug("Using MongoDB URI without credentials")
+        return base_uri
+
+def get_neo4j_driver() -> Driver:
+    """Get shared pooled Neo4j driver. Creates it once, then reuses it."""
+    global _neo4j_driver
+
+    if _neo4j_driver is None:
+        with _lock:
+            # Double-check pattern
+            if _neo4j_driver is None:
+                _neo4j_driver = GraphDatabase.driver(
+                    Config.NEO4J_URI,
+                    auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD),
+                    max_connection_pool_size=Config.NEO4J_MAX_CONNECTION_POOL_SIZE,
+                    connection_timeout=10.0,
+                    max_connection_lifetime=300
+                )
+                logger.info(f"Created shared Neo4j driver "
+                            f"(pool size {Config.NEO4J_MAX_CONNECTION_POOL_SIZE})")
+
+    return _neo4j_driver
+
+def get_mongo_client() -> MongoClient:
+    """Get shared pooled MongoDB client. Creates it once, then reuses it."""
+    global _mongo_client
+
+    if _mongo_client is None:
+        with _lock:
+            # Double-check pattern
+            if _mongo_client is None:
+                _mongo_client = MongoClient(
+                    build_mongo_uri(),
+                    maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                    minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                    serverSelectionTimeoutMS=10000,  # 10 second timeout
+                    connectTimeoutMS=5000,  # 5 second connection timeout
+                    socketTimeoutMS=30000   # 30 second socket timeout
+                )
+                logger.info(f"Created shared MongoDB client "
+                            f"(pool size {Config.MONGO_MIN_POOL_SIZE}-{Config.MONGO_MAX_POOL_SIZE})")
+
+    return _mongo_client
+
+def close_database_clients():
+    """Close the shared Neo4j driver and MongoDB client (they are recreated on next use)"""
+    global _neo4j_driver, _mongo_client
+
+    with _lock:
+        if _neo4j_driver is not None:
+            try:
+                _neo4j_driver.close()
+            except Exception as e:
+                logger.warning(f"Error closing Neo4j driver: {e}")
+            _neo4j_driver = None
+
+        if _mongo_client is not None:
+            try:
+                _mongo_client.close()
+            except Exception as e:
+                logger.warning(f"Error closing MongoDB client: {e}")
+            _mongo_client = None
+
+atexit.register(close_database_clients)
@@ -1,18 +1,28 @@
 import os
+import json
 import shutil
+import hashlib
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from .azure_client import AzureOpenAIClient
+from typing import Callable, Optional, TYPE_CHECKING
 from .config import Config
 
+if TYPE_CHECKING:
+    # Only for annotations; the client (and openai) is imported by the caller when needed
+    from .azure_client import AzureOpenAIClient
+
 logger = logging.getLogger(__name__)
 
 class DocumentationProcessor:
-    def __init__(self, azure_client: AzureOpenAIClient):
+    def __init__(self, azure_client: "AzureOpenAIClient"):
         self.azure_client = azure_client
         self.database_dir = Config.DATABASE_FILES_DIR
         self.working_dir = Config.WORKING_DIR
         self.system_prompt = Config.SYSTEM_PROMPT
+        self.max_workers = Config.DOC_GENERATION_WORKERS
+        self.manifest_file = Config.DOC_MANIFEST_FILE
     
     def _cleanup_working_dir(self):
         """Clean up and recreate working directory with error handling"""
@@ -34,24 +44,123 @@ class DocumentationProcessor:
             logger.error(f"Unexpected error managing working directory {self.working_dir}: {e}")
             raise
     
-    def process_sql_files(self):
-        """Process all SQL files and generate documentation"""
-        # Clean up working directory
-        self._cleanup_working_dir()
+    def process_sql_files(self, on_doc_ready: Optional[Callable[[Path], None]] = None, incremental: bool = False):
+        """Process all SQL files and generate documentation for new or changed objects
+        
+        A manifest next to the SQL files records the SQL content hash, model and
+        system prompt hash used for each generated document. Documents whose
+        entry still matches are kept, so only new or changed objects reach the LLM.
         
-        # Clean up existing markdown files
-        self._cleanup_existing_docs()
+        Args:
+            on_doc_ready: Optional callback for pipelined ingestion. When given, the
+                working directory is expected to be prepared by the caller (see
+                reset_working_dir) and every document is copied there and passed to
+                the callback as soon as it is available, instead of all at the end.
+            incremental: Keep the working directory (and the RAG storage files in it)
+                and only synchronize its markdown files with the generated docs.
+        """
+        # Clean up working directory
+        if on_doc_ready is None and not incremental:
+            self._cleanup_working_dir()
         
-        # Find and process SQL files
+        # Find SQL files and drop documentation whose SQL file is gone
         sql_files = self._find_sql_files()
         logger.info(f"Found {len(sql_files)} SQL files in {self.database_dir}")
+        manifest = self._load_manifest()
+        self._cleanup_stale_docs(manifest, {self._manifest_key(sql_file) for sql_file, _ in sql_files})
         
-        # Generate documentation for each SQL file
+        # Generate documentation only for new or changed SQL files
+        model = Config.get_llm_model()
+        prompt_hash = self._hash_text(self.system_prompt)
+        pending = {}
         for sql_file, content in sql_files:
-            self._generate_doc_for_file(sql_file, content)
+            entry = {
+                "sql_hash": self._hash_text(content),
+                "model": model,
+                "prompt_hash": prompt_hash,
+            }
+            key = self._manifest_key(sql_file)
+            if manifest.get(key) == entry and sql_file.with_suffix(".md").exists():
+                continue
+            manifest.pop(key, None)
+            # Drop the outdated document so a failed regeneration never leaves stale docs behind
+            self._delete_doc(sql_file.with_suffix(".md"))
+            pending[sql_file] = (content, entry)
+        
+        logger.info(f"{len(pending)} of {len(sql_files)} SQL files are new or changed, "
+                    f"{len(sql_files) - len(pending)} documents are up to date")
+        
+        # Up-to-date documents can be ingested right away in pipelined mode
+        if on_doc_ready:
+            for sql_file, _ in sql_files:
+                if sql_file not in pending:
+                    self._publish_doc(sql_file.with_suffix(".md"), on_doc_ready)
+        
+        failed_files = self._generate_docs(
+            [(sql_file, content) for sql_file, (content, _) in pending.items()],
+            on_doc_ready
+        )
+        for sql_file, (_, entry) in pending.items():
+            if sql_file not in failed_files:
+                manifest[self._manifest_key(sql_file)] = entry
+        self._save_manifest(manifest)
         
         # Copy markdown files to working directory
-        self._copy_docs_to_working_dir()
+        if incremental:
+            self.sync_docs_to_working_dir()
+        elif on_doc_ready is None:
+            self._copy_docs_to_working_dir()
+    
+    def reset_working_dir(self):
+        """Recreate an empty working directory (used before pipelined processing)"""
+        self._cleanup_working_dir()
+    
+    def _publish_doc(self, md_file: Path, on_doc_ready: Callable[[Path], None]):
+        """Copy a finished document to the working directory and hand it to the callback"""
+        target_file = Path(self.working_dir) / md_file.name
+        try:
+            self._copy_single_file(md_file, target_file)
+            logger.info(f"Copied file {md_file} to {target_file}")
+        except Exception as e:
+            logger.error(f"Failed to copy {md_file} to {target_file}: {e}")
+            return
+        on_doc_ready(target_file)
+    
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        """Return the SHA-256 hex digest of a text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _manifest_key(self, sql_file: Path) -> str:
+        """Manifest key of a SQL file - its path relative to the database directory"""
+        return sql_file.relative_to(self.database_dir).as_posix()
+    
+    def _load_manifest(self) -> dict:
+        """Load the documentation manifest, starting empty if it is missing or unreadable"""
+        if not self.manifest_file.exists():
+            logger.info(f"No documentation manifest found at {self.manifest_file}, all documents will be generated")
+            return {}
+        
+        try:
+            with open(self.manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+            return manifest.get("files", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable documentation manifest {self.manifest_file}: {e}")
+            return {}
+    
+    def _save_manifest(self, manifest: dict):
+        """Write the documentation manifest atomically"""
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "files": manifest}, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.manifest_file)
+            logger.info(f"Saved documentation manifest with {len(manifest)} entries to {self.manifest_file}")
+        except OSError as e:
+            # A missing manifest only costs a full regeneration on the next run
+            logger.error(f"Failed to save documentation manifest {self.manifest_file}: {e}")
     
     def _find_sql_files(self) -> list:
         """Find all SQL files in database directory with error handling"""
@@ -75,29 +184,107 @@ class DocumentationProcessor:
                 
         return sql_files
     
-    def _cleanup_existing_docs(self):
-        """Remove existing markdown files"""
+    def _cleanup_stale_docs(self, manifest: dict, current_keys: set):
+        """Remove markdown files whose SQL file no longer exists and prune their manifest entries"""
         failed_deletions = []
         
+        for key in [key for key in manifest if key not in current_keys]:
+            manifest.pop(key)
+            logger.info(f"Removed manifest entry for deleted SQL file {key}")
+        
         for md_file in self.database_dir.rglob("*.md"):
-            try:
-                md_file.unlink(missing_ok=True)
-                logger.info(f"Deleted file {md_file}")
-            except PermissionError as e:
-                logger.error(f"Permission denied deleting file {md_file}: {e}")
-                failed_deletions.append(md_file)
-            except OSError as e:
-                logger.error(f"OS error deleting file {md_file}: {e}")
-                failed_deletions.append(md_file)
-            except Exception as e:
-                logger.error(f"Unexpected error deleting file {md_file}: {e}")
+            if md_file.with_suffix(".sql").exists():
+                continue
+            if not self._delete_doc(md_file):
                 failed_deletions.append(md_file)
         
         if failed_deletions:
             logger.warning(f"Failed to delete {len(failed_deletions)} markdown files: {failed_deletions}")
     
-    def _generate_doc_for_file(self, sql_file: Path, content: str):
-        """Generate documentation for a single SQL file with comprehensive error handling"""
+    def _delete_doc(self, md_file: Path) -> bool:
+        """Delete a markdown file if it exists, returning False on failure"""
+        if not md_file.exists():
+            return True
+        try:
+            md_file.unlink(missing_ok=True)
+            logger.info(f"Deleted file {md_file}")
+            return True
+        except PermissionError as e:
+            logger.error(f"Permission denied deleting file {md_file}: {e}")
+        except OSError as e:
+            logger.error(f"OS error deleting file {md_file}: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error deleting file {md_file}: {e}")
+        return False
+    
+    def _generate_docs(self, sql_files: list, on_doc_ready: Optional[Callable[[Path], None]] = None) -> list:
+        """Generate documentation for the given SQL files, sequentially or with a worker pool
+        
+        Every file writes its own markdown file, so the output is the same
+        regardless of the number of workers; only the completion order differs.
+        If on_doc_ready is given, each successfully generated document is
+        published to it as soon as it is written.
+        
+        Returns:
+            List of SQL files for which documentation generation failed
+        """
+        total_files = len(sql_files)
+        if total_files == 0:
+            return []
+        
+        workers = max(1, min(self.max_workers, total_files))
+        logger.info(f"Generating documentation for {total_files} SQL files with {workers} worker(s)")
+        
+        start_time = time.monotonic()
+        completed = 0
+        failed_files = []
+        
+        if workers == 1:
+            for sql_file, content in sql_files:
+                if not self._generate_doc_for_file(sql_file, content):
+                    failed_files.append(sql_file)
+                elif on_doc_ready:
+                    self._publish_doc(sql_file.with_suffix(".md"), on_doc_ready)
+                completed += 1
+                self._log_generation_progress(sql_file, completed, total_files, start_time)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docgen") as executor:
+                futures = {
+                    executor.submit(self._generate_doc_for_file, sql_file, content): sql_file
+                    for sql_file, content in sql_files
+                }
+                for future in as_completed(futures):
+                    sql_file = futures[future]
+                    if not future.result():
+                        failed_files.append(sql_file)
+                    elif on_doc_ready:
+                        self._publish_doc(sql_file.with_suffix(".md"), on_doc_ready)
+                    completed += 1
+                    self._log_generation_progress(sql_file, completed, total_files, start_time)
+        
+        elapsed = time.monotonic() - start_time
+        throughput = total_files / elapsed * 60 if elapsed > 0 else 0.0
+        logger.info(
+            f"Documentation generation completed: {total_files - len(failed_files)}/{total_files} successful "
+            f"in {elapsed:.1f}s ({throughput:.1f} files/min)"
+        )
+        if failed_files:
+            logger.warning(f"Failed to generate documentation for {len(failed_files)} files: {failed_files}")
+        
+        return failed_files
+    
+    def _log_generation_progress(self, sql_file: Path, completed: int, total_files: int, start_time: float):
+        """Log per-file progress together with the running throughput"""
+        elapsed = time.monotonic() - start_time
+        throughput = completed / elapsed * 60 if elapsed > 0 else 0.0
+        logger.info(f"Progress {completed}/{total_files}: {sql_file.name} ({throughput:.1f} files/min)")
+    
+    def _generate_doc_for_file(self, sql_file: Path, content: str) -> bool:
+        """Generate documentation for a single SQL file with comprehensive error handling
+        
+        Returns:
+            True if the documentation was generated and written, False otherwise
+        """
         md_file_path = sql_file.with_suffix(".md")
         
         try:
@@ -111,10 +298,12 @@ class DocumentationProcessor:
             self._write_documentation_file(md_file_path, documentation)
             
             logger.info(f"Generated documentation for {sql_file}")
+            return True
             
         except Exception as e:
             logger.error(f"Error generating documentation for {sql_file}: {e}")
             # Don't re-raise - continue processing other files
+            return False
     
     def _write_documentation_file(self, file_path: Path, content: str):
         """Write documentation to file
@@ -223,4 +412,23 @@ class DocumentationProcessor:
         self._cleanup_working_dir()
         
         # Copy existing markdown files to working directory
-        self._copy_docs_to_working_dir()
\ No newline at end of file
+        self._copy_docs_to_working_dir()
+    
+    def sync_docs_to_working_dir(self):
+        """Synchronize markdown files in the working directory without touching RAG storage files
+        
+        Copies all documentation from the database directory and removes markdown
+        files from the working directory whose source documentation no longer exists.
+        """
+        try:
+            os.makedirs(self.working_dir, exist_ok=True)
+        except OSError as e:
+            logger.error(f"OS error creating working directory {self.working_dir}: {e}")
+            raise
+        
+        self._copy_docs_to_working_dir()
+        
+        current_names = {md_file.name for md_file in self.database_dir.rglob("*.md")}
+        for md_file in Path(self.working_dir).glob("*.md"):
+            if md_file.name not in current_names:
+                self._delete_doc(md_file)
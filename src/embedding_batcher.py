@@ -0,0 +1,254 @@
+"""Micro-batching and token-aware splitting of embedding requests."""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding calls into fewer provider requests.
+
+    Requests arriving within max_wait_ms of the first pending request are
+    collected until max_batch_size texts are waiting, sent to the provider as
+    one call, and the resulting vectors are scattered back to each caller.
+    A single request larger than max_batch_size is sent on its own.
+    """
+
+    def __init__(self, func, max_batch_size: int, max_wait_ms: float):
+        """Initialize the batcher.
+
+        Args:
+            func: Async embedding function taking a list of texts
+            max_batch_size: Maximum number of texts per provider call
+            max_wait_ms: How long the first pending request waits for others
+        """
+        self.func = func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._flush_handle = None
+        self._tasks = set()  # Keep send tasks referenced so they are not garbage-collected mid-call
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "texts": 0, "max_batch_texts": 0}
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._pending and self._pending_texts + len(texts) > self.max_batch_size:
+            self._flush()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send all pending requests, split into batches of at most max_batch_size texts"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending, self._pending_texts = self._pending, [], 0
+        batch, batch_texts = [], 0
+        for request in pending:
+            if batch and batch_texts + len(request[0]) > self.max_batch_size:
+                self._start_send(batch)
+                batch, batch_texts = [], 0
+            batch.append(request)
+            batch_texts += len(request[0])
+        if batch:
+            self._start_send(batch)
+
+    def _start_send(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        all_texts = [text for texts, _ in batch for text in texts]
+        with self._stats_lock:
+            self._stats["requests"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(all_texts)
+            self._stats["max_batch_texts"] = max(self._stats["max_batch_texts"], len(all_texts))
+
+        try:
+            vectors = await self.func(all_texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(batch) > 1:
+            logger.debug(f"Coalesced {len(batch)} embedding requests into one call with {len(all_texts)} texts")
+
+        offset = 0
+        for texts, future in batch:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        with self._stats_lock:
+            stats = self._stats.copy()
+        stats["avg_batch_texts"] = stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        stats["avg_requests_per_batch"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000
+        return stats
+
+    def reset_stats(self):
+        """Reset batching statistics"""
+        with self._stats_lock:
+            self._stats = {"requests": 0, "batches": 0, "texts": 0, "max_batch_texts": 0}
+
+
+class TokenAwareEmbeddingSplitter:
+    """Splits embedding calls into sub-batches sized by estimated token count.
+
+    Sub-batches are sent to the provider concurrently (bounded by
+    max_concurrency) and their vectors are reassembled in input order. When the
+    provider throttles or times out, the number of texts per sub-batch is
+    halved and the failed sub-batch is retried in smaller pieces; after a run of
+    successful calls the limit grows back towards max_batch_texts.
+    """
+
+    CHARS_PER_TOKEN = 3  # Conservative estimate for SQL identifiers and prose
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5  # Seconds, doubled on every retry
+    GROWTH_INTERVAL = 10  # Successful calls before the sub-batch limit grows again
+
+    def __init__(self, func, max_batch_texts: int, max_batch_tokens: int, max_text_tokens: int,
+                 max_concurrency: int):
+        """Initialize the splitter.
+
+        Args:
+            func: Async embedding function taking a list of texts
+            max_batch_texts: Upper bound for texts per provider call
+            max_batch_tokens: Estimated token budget per provider call (all texts together)
+            max_text_tokens: Input limit of the embedding model for a single text
+            max_concurrency: Maximum number of provider calls in flight
+        """
+        self.func = func
+        self.max_batch_texts = max_batch_texts
+        self.max_batch_tokens = max_batch_tokens
+        self.max_text_tokens = max_text_tokens
+        self.max_concurrency = max_concurrency
+        self.batch_texts = max_batch_texts  # Current adaptive limit
+        self._successes = 0
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._stats_lock = threading.Lock()
+        self._stats = {"provider_calls": 0, "retries": 0, "throttled": 0, "timeouts": 0}
+
+    def estimate_tokens(self, text: str) -> int:
+        return len(text) // self.CHARS_PER_TOKEN + 1
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to an event loop; main.py runs several loops in sequence
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def split(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """Return (start, end) ranges that respect the current text and token limits"""
+        ranges = []
+        start, tokens = 0, 0
+        for i, text in enumerate(texts):
+            text_tokens = self.estimate_tokens(text)
+            if text_tokens > self.max_text_tokens:
+                logger.warning(f"Embedding input of ~{text_tokens} tokens exceeds the model's "
+                               f"{self.max_text_tokens} token input limit and may be truncated")
+            if i > start and (i - start >= self.batch_texts or tokens + text_tokens > self.max_batch_tokens):
+                ranges.append((start, i))
+                start, tokens = i, 0
+            tokens += text_tokens
+        if start < len(texts):
+            ranges.append((start, len(texts)))
+        return ranges
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        ranges = self.split(texts)
+        if len(ranges) <= 1:
+            return await self._embed_sub_batch(texts, attempt=0)
+
+        logger.debug(f"Split {len(texts)} embedding texts into {len(ranges)} sub-batches")
+        results = await asyncio.gather(*[self._embed_sub_batch(texts[start:end], attempt=0)
+                                         for start, end in ranges])
+        return np.concatenate(results)
+
+    async def _embed_sub_batch(self, texts: List[str], attempt: int) -> np.ndarray:
+        async with self._get_semaphore():
+            with self._stats_lock:
+                self._stats["provider_calls"] += 1
+            try:
+                vectors = await self.func(texts)
+                self._record_success()
+                return np.asarray(vectors, dtype=np.float32)
+            except Exception as e:
+                kind = self._classify_error(e)
+                if kind is None or attempt >= self.MAX_RETRIES:
+                    raise
+                self._shrink(len(texts), kind)
+
+        delay = self.RETRY_BACKOFF * (2 ** attempt)
+        logger.warning(f"Embedding request for {len(texts)} texts was {kind}, retrying in {delay:.1f}s "
+                       f"with at most {self.batch_texts} texts per request")
+        await asyncio.sleep(delay)
+
+        with self._stats_lock:
+            self._stats["retries"] += 1
+        results = await asyncio.gather(*[self._embed_sub_batch(texts[start:end], attempt + 1)
+                                         for start, end in self.split(texts)])
+        return np.concatenate(results)
+
+    @staticmethod
+    def _classify_error(error: Exception) -> Optional[str]:
+        """Return "throttled" or "timed out" for errors worth retrying in smaller batches"""
+        error_type = type(error).__name__
+        if "RateLimit" in error_type or getattr(error, "status_code", None) == 429:
+            return "throttled"
+        if "Timeout" in error_type or isinstance(error, asyncio.TimeoutError):
+            return "timed out"
+        return None
+
+    def _shrink(self, failed_size: int, kind: str):
+        with self._stats_lock:
+            self._stats["throttled" if kind == "throttled" else "timeouts"] += 1
+            self.batch_texts = max(1, min(self.batch_texts, failed_size) // 2)
+            self._successes = 0
+
+    def _record_success(self):
+        with self._stats_lock:
+            if self.batch_texts >= self.max_batch_texts:
+                return
+            self._successes += 1
+            if self._successes >= self.GROWTH_INTERVAL:
+                self.batch_texts = min(self.max_batch_texts, self.batch_texts * 2)
+                self._successes = 0
+                logger.info(f"Embedding sub-batch limit raised to {self.batch_texts} texts")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sub-batching statistics"""
+        with self._stats_lock:
+            stats = self._stats.copy()
+            stats["batch_texts_limit"] = self.batch_texts
+        return stats
+
+    def reset_stats(self):
+        """Reset sub-batching statistics (the adaptive limit is kept)"""
+        with self._stats_lock:
+            self._stats = {"provider_calls": 0, "retries": 0, "throttled": 0, "timeouts": 0}
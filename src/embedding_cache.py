@@ -0,0 +1,271 @@
+"""Persistent, content-addressed embedding cache backed by memory-mapped float32 arrays."""
+
+import os
+import json
+import time
+import asyncio
+import atexit
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import numpy as np
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Disk-backed embedding cache keyed by model and text hash.
+
+    Vectors live in a memory-mapped float32 matrix (vectors.f32), one row per
+    cached text. A parallel memory-mapped key array (keys.bin) stores the text
+    hash of every row, so a row is only served if its key matches, even if the
+    JSON index (index.json) is older than the matrices after a crash. When the
+    cache holds max_entries vectors, the least recently used rows are reused.
+    """
+
+    GROWTH_ROWS = 4096  # Rows added whenever the matrices need to grow
+    KEY_BYTES = 16  # Truncated SHA-256 of the text
+    FLUSH_INTERVAL = 30.0  # Seconds between automatic index flushes
+
+    def __init__(self, cache_dir: Path, model: str, embedding_dim: int, max_entries: int):
+        """Initialize the cache for one embedding model and dimension.
+
+        Args:
+            cache_dir: Base directory; each model/dimension gets its own subdirectory
+            model: Embedding model name
+            embedding_dim: Dimension of the embedding vectors
+            max_entries: Maximum number of cached vectors before LRU eviction
+        """
+        namespace = hashlib.sha256(f"{model}:{embedding_dim}".encode("utf-8")).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) / namespace
+        self.model = model
+        self.embedding_dim = embedding_dim
+        self.max_entries = max_entries
+
+        self._vectors_path = self.cache_dir / "vectors.f32"
+        self._keys_path = self.cache_dir / "keys.bin"
+        self._index_path = self.cache_dir / "index.json"
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()  # key -> row, least recently used first
+        self._free_rows = []
+        self._capacity = 0
+        self._vectors = None
+        self._keys = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+        self._load()
+
+    @classmethod
+    def _key(cls, text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()[:cls.KEY_BYTES]
+
+    def _load(self):
+        """Open existing matrices and index, if any"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "embedding_dim": self.embedding_dim}, f)
+
+        if self._vectors_path.exists() and self._keys_path.exists():
+            capacity = min(
+                self._vectors_path.stat().st_size // (self.embedding_dim * 4),
+                self._keys_path.stat().st_size // self.KEY_BYTES,
+            )
+            if capacity > 0:
+                self._open_arrays(capacity)
+
+        used_rows = set()
+        if self._index_path.exists():
+            try:
+                with open(self._index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+                for key_hex, row in index.get("entries", []):
+                    if row < self._capacity and row not in used_rows:
+                        self._entries[bytes.fromhex(key_hex)] = row
+                        used_rows.add(row)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable embedding cache index {self._index_path}: {e}")
+                self._entries.clear()
+                used_rows.clear()
+
+        self._free_rows = [row for row in range(self._capacity - 1, -1, -1) if row not in used_rows]
+        logger.info(f"Opened embedding cache {self.cache_dir} for {self.model} "
+                    f"with {len(self._entries)} cached vectors")
+
+    def _open_arrays(self, capacity: int):
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(capacity, self.embedding_dim))
+        self._keys = np.memmap(self._keys_path, dtype=np.uint8, mode="r+",
+                               shape=(capacity, self.KEY_BYTES))
+        self._capacity = capacity
+
+    def _grow(self):
+        """Extend both matrices by GROWTH_ROWS rows (bounded by max_entries)"""
+        new_capacity = min(self.max_entries, self._capacity + self.GROWTH_ROWS)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._keys.flush()
+            self._vectors = None
+            self._keys = None
+
+        for path, row_bytes in ((self._vectors_path, self.embedding_dim * 4), (self._keys_path, self.KEY_BYTES)):
+            with open(path, "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+
+        old_capacity = self._capacity
+        self._open_arrays(new_capacity)
+        self._free_rows.extend(range(new_capacity - 1, old_capacity - 1, -1))
+
+    def _allocate_row(self) -> int:
+        if not self._free_rows:
+            if self._capacity < self.max_entries:
+                self._grow()
+            else:
+                # Evict the least recently used 10% in one go to amortize the cost
+                evict_count = min(max(1, self.max_entries // 10), len(self._entries))
+                for _ in range(evict_count):
+                    _, row = self._entries.popitem(last=False)
+                    self._free_rows.append(row)
+                self._stats["evictions"] += evict_count
+        return self._free_rows.pop()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return cached vectors for the texts, with None for every miss"""
+        results = []
+        with self._lock:
+            for text in texts:
+                key = self._key(text)
+                row = self._entries.get(key)
+                if row is not None and bytes(self._keys[row]) == key:
+                    self._entries.move_to_end(key)
+                    results.append(np.array(self._vectors[row], dtype=np.float32))
+                    self._stats["hits"] += 1
+                else:
+                    if row is not None:
+                        # Index entry points at a row that was reused - drop it
+                        del self._entries[key]
+                        self._free_rows.append(row)
+                    results.append(None)
+                    self._stats["misses"] += 1
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """Store vectors for the texts; failures are logged and never raised"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.embedding_dim or len(vectors) != len(texts):
+            logger.warning(f"Not caching embeddings with unexpected shape {vectors.shape}")
+            return
+
+        with self._lock:
+            try:
+                for text, vector in zip(texts, vectors):
+                    key = self._key(text)
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        continue
+                    row = self._allocate_row()
+                    self._vectors[row] = vector
+                    self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+                    self._entries[key] = row
+                self._dirty = True
+
+                if time.monotonic() - self._last_flush > self.FLUSH_INTERVAL:
+                    self._flush_locked()
+            except OSError as e:
+                logger.warning(f"Failed to write embedding cache {self.cache_dir}: {e}")
+
+    def flush(self):
+        """Persist the matrices and the index to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._dirty:
+            return
+        try:
+            self._vectors.flush()
+            self._keys.flush()
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": [[key.hex(), row] for key, row in self._entries.items()]}, f)
+            os.replace(tmp_path, self._index_path)
+            self._dirty = False
+            logger.debug(f"Flushed embedding cache with {len(self._entries)} vectors")
+        except OSError as e:
+            logger.warning(f"Failed to flush embedding cache {self.cache_dir}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        """Reset cache hit/miss statistics (cached vectors are kept)"""
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def with_embedding_cache(func, cache: EmbeddingCache):
+    """Wrap an async embedding function so only cache misses reach the provider"""
+    async def cached_embedding_func(texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, cache.embedding_dim), dtype=np.float32)
+
+        # Lookups, memmap writes and the periodic index flush are blocking file I/O
+        # under the cache lock; keep them off the event loop
+        vectors = await asyncio.to_thread(cache.get_many, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = np.asarray(await func(missing_texts), dtype=np.float32)
+            await asyncio.to_thread(cache.put_many, missing_texts, fresh)
+            for position, i in enumerate(missing):
+                vectors[i] = fresh[position]
+        else:
+            logger.debug(f"Served {len(texts)} embeddings from cache")
+
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    return cached_embedding_func
+
+
+# Shared instances, one per model and dimension
+_embedding_caches: Dict[tuple, EmbeddingCache] = {}
+_embedding_caches_lock = threading.Lock()
+
+
+def _flush_all():
+    for cache in list(_embedding_caches.values()):
+        cache.flush()
+
+
+atexit.register(_flush_all)
+
+
+def get_embedding_cache(model: str, embedding_dim: int) -> Optional[EmbeddingCache]:
+    """Get the shared embedding cache for a model, or None if caching is disabled"""
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return None
+
+    key = (model, embedding_dim)
+    with _embedding_caches_lock:
+        if key not in _embedding_caches:
+            _embedding_caches[key] = EmbeddingCache(
+                cache_dir=Config.EMBEDDING_CACHE_DIR,
+                model=model,
+                embedding_dim=embedding_dim,
+                max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        return _embedding_caches[key]
@@ -0,0 +1,357 @@
+"""FAISS vector storage with a configurable index type (flat, HNSW or IVF-PQ) and vector encoding."""
+
+import json
+import math
+import base64
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+import numpy as np
+import faiss
+from lightrag.kg import STORAGES, STORAGE_IMPLEMENTATIONS
+from lightrag.kg.faiss_impl import FaissVectorDBStorage
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_pq")
+VECTOR_ENCODINGS = ("float32", "float16", "int8")
+
+STORAGE_NAME = "ConfigurableFaissVectorDBStorage"
+
+# Scalar quantizer type per encoding (float32 uses the plain flat storage)
+_SQ_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+_NUMPY_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+
+def get_index_params() -> Dict[str, Any]:
+    """Collect the FAISS index parameters from the configuration"""
+    return {
+        "encoding": Config.FAISS_VECTOR_ENCODING,
+        "hnsw_m": Config.FAISS_HNSW_M,
+        "hnsw_ef_construction": Config.FAISS_HNSW_EF_CONSTRUCTION,
+        "hnsw_ef_search": Config.FAISS_HNSW_EF_SEARCH,
+        "ivf_nlist": Config.FAISS_IVF_NLIST,
+        "ivf_nprobe": Config.FAISS_IVF_NPROBE,
+        "pq_m": Config.FAISS_PQ_M,
+        "pq_nbits": Config.FAISS_PQ_NBITS,
+        "min_train_vectors": Config.FAISS_MIN_TRAIN_VECTORS,
+        "retrain_growth": Config.FAISS_RETRAIN_GROWTH,
+    }
+
+
+def _pq_subquantizers(dim: int, requested: int) -> int:
+    """Return the requested PQ sub-quantizer count, or the largest divisor of dim up to 64"""
+    if requested and dim % requested == 0:
+        return requested
+    if requested:
+        logger.warning(f"FAISS_PQ_M={requested} does not divide dimension {dim}, choosing automatically")
+    return max(m for m in range(1, min(dim, 64) + 1) if dim % m == 0)
+
+
+def min_train_vectors(index_type: str, encoding: str, params: Dict[str, Any]) -> int:
+    """Return how many vectors an index of this type and encoding needs before it can be trained"""
+    # The 8-bit scalar quantizer learns per-dimension ranges from the data and clips
+    # vectors outside them, so it needs a representative sample just like IVF-PQ
+    if index_type == "ivf_pq" or encoding == "int8":
+        return params["min_train_vectors"]
+    return 0
+
+
+def build_index(index_type: str, dim: int, vectors: np.ndarray, params: Dict[str, Any],
+                trained: Optional[faiss.Index] = None) -> faiss.Index:
+    """Build an inner-product index of the given type and add the vectors.
+
+    Flat and HNSW indexes store their vectors with params["encoding"]; IVF-PQ
+    always stores PQ codes. An index that needs training data and has too few
+    vectors is built as an unencoded flat index instead, and the storage
+    retrains once enough vectors exist.
+
+    Args:
+        index_type: One of INDEX_TYPES
+        dim: Vector dimension
+        vectors: float32 matrix of L2-normalized vectors (may be empty)
+        params: Index parameters as returned by get_index_params()
+        trained: Optional IVF-PQ index whose coarse quantizer and codebooks are
+            reused (it is emptied and refilled) instead of training new ones
+
+    Returns:
+        The populated index with its search parameters applied
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, dim)
+    encoding = params["encoding"]
+    if len(vectors) < min_train_vectors(index_type, encoding, params):
+        index_type, encoding = "flat", "float32"
+
+    if index_type == "hnsw":
+        if encoding in _SQ_TYPES:
+            index = faiss.IndexHNSWSQ(dim, _SQ_TYPES[encoding], params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["hnsw_ef_construction"]
+    elif index_type == "ivf_pq" and trained is not None and index_type_of(trained) == "ivf_pq":
+        index = trained
+        index.reset()
+    elif index_type == "ivf_pq":
+        nlist = params["ivf_nlist"] or max(1, int(4 * math.sqrt(len(vectors))))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim, params["pq_m"]),
+                                 params["pq_nbits"], faiss.METRIC_INNER_PRODUCT)
+        logger.info(f"Training IVF-PQ index on {len(vectors)} vectors ({nlist} lists)")
+    elif encoding in _SQ_TYPES:
+        index = faiss.IndexScalarQuantizer(dim, _SQ_TYPES[encoding], faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+
+    if not index.is_trained:
+        index.train(vectors)
+    if len(vectors):
+        index.add(vectors)
+    apply_search_params(index, params)
+    return index
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any]):
+    """Set query-time parameters (efSearch for HNSW, nprobe for IVF)"""
+    index_kind = index_type_of(index)
+    if index_kind == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = params["hnsw_ef_search"]
+    elif index_kind == "ivf_pq":
+        faiss.extract_index_ivf(index).nprobe = params["ivf_nprobe"]
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Return the INDEX_TYPES name of an index"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    return "flat"
+
+
+def is_trained_on_data(index: faiss.Index) -> bool:
+    """Whether an index learned its quantizers from the vectors (IVF-PQ or int8)"""
+    return index_type_of(index) == "ivf_pq" or index_encoding_of(index) == "int8"
+
+
+def index_encoding_of(index: faiss.Index) -> Optional[str]:
+    """Return the VECTOR_ENCODINGS name of a flat or HNSW index (None for IVF-PQ)"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return None
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        for encoding, qtype in _SQ_TYPES.items():
+            if index.sq.qtype == qtype:
+                return encoding
+    return "float32"
+
+
+def encode_vector(vector: np.ndarray, encoding: str) -> Dict[str, Any]:
+    """Return the metadata fields holding a float32 vector in the given encoding"""
+    if encoding == "int8":
+        # Symmetric per-vector scale so every vector uses the full int8 range
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return {"__vector__": np.round(vector / scale).astype(np.int8), "__vector_scale__": scale}
+    return {"__vector__": np.asarray(vector, dtype=_NUMPY_DTYPES[encoding])}
+
+
+def decode_vector(meta: Dict[str, Any]) -> np.ndarray:
+    """Return the vector stored in an entry's metadata as float32"""
+    vector = np.asarray(meta["__vector__"])
+    if vector.dtype == np.int8:
+        return vector.astype(np.float32) * np.float32(meta["__vector_scale__"])
+    return vector.astype(np.float32, copy=False)
+
+
+class ConfigurableFaissVectorDBStorage(FaissVectorDBStorage):
+    """LightRAG FAISS storage that uses FAISS_INDEX_TYPE and FAISS_VECTOR_ENCODING.
+
+    LightRAG keeps the raw vector of every entry in the metadata file and
+    rebuilds the index after deletions, including the delete that precedes
+    every upsert of an existing entity or relation. Flat indexes remove the
+    vectors in place. HNSW and IVF-PQ indexes, which cannot, fall back to a
+    flat index of the remaining vectors, and the configured type is rebuilt
+    once per batch in index_done_callback, off the event loop and reusing the
+    IVF-PQ training. An existing index is converted when it is loaded, and
+    indexes that need training are trained once enough vectors exist and
+    retrained each time the number of vectors has grown by FAISS_RETRAIN_GROWTH.
+
+    The raw vectors are kept in memory as numpy arrays in the configured
+    encoding rather than lists of Python floats. float16 and int8 vectors are
+    written to the metadata file as base64; float32 vectors stay JSON lists so
+    the files remain readable by LightRAG's FaissVectorDBStorage.
+    """
+
+    def __post_init__(self):
+        self._index_type = Config.FAISS_INDEX_TYPE
+        self._index_params = get_index_params()
+        self._encoding = self._index_params["encoding"]
+        self._trained_index = None  # IVF-PQ index set aside by a removal, reused by the next rebuild
+        self._version = 0  # Bumped on every change, so a rebuild can tell it is stale
+        self._trained_on = 0  # Vectors the current quantizers were trained on (0 = untrained)
+        super().__post_init__()
+        if self._needs_rebuild():
+            self._rebuild_index()
+
+    def _stored_vectors(self, id_to_meta: dict) -> np.ndarray:
+        if not id_to_meta:
+            return np.empty((0, self._dim), dtype=np.float32)
+        return np.vstack([decode_vector(meta) for meta in id_to_meta.values()])
+
+    def _needs_rebuild(self) -> bool:
+        """Check whether the current index should be rebuilt with the configured type and encoding"""
+        if len(self._id_to_meta) < min_train_vectors(self._index_type, self._encoding, self._index_params):
+            # Stay flat until there is enough data to train the quantizers
+            return False
+        if index_type_of(self._index) != self._index_type or self._needs_retrain():
+            return True
+        return self._index_type != "ivf_pq" and index_encoding_of(self._index) != self._encoding
+
+    def _needs_retrain(self) -> bool:
+        """Check whether the corpus has outgrown the sample the quantizers were trained on"""
+        growth = self._index_params["retrain_growth"]
+        return bool(growth and self._trained_on and len(self._id_to_meta) >= self._trained_on * growth)
+
+    def _set_index(self, index: faiss.Index, trained_on: int):
+        self._index = index
+        if not is_trained_on_data(index):
+            self._trained_on = 0
+        elif trained_on:
+            self._trained_on = trained_on
+
+    def _rebuild_index(self):
+        vectors = self._stored_vectors(self._id_to_meta)
+        self._set_index(build_index(self._index_type, self._dim, vectors, self._index_params), len(vectors))
+
+    def _encode_meta(self, meta: dict):
+        """Convert an entry's stored vector (list, base64 string or array) to the configured encoding"""
+        vector = meta.get("__vector__")
+        if vector is None:
+            return
+        if isinstance(vector, str):
+            dtype = _NUMPY_DTYPES[meta.pop("__vector_dtype__", "float16")]
+            meta["__vector__"] = np.frombuffer(base64.b64decode(vector), dtype=dtype)
+        elif isinstance(meta["__vector__"], np.ndarray) and meta["__vector__"].dtype == _NUMPY_DTYPES[self._encoding]:
+            return
+        vector = decode_vector(meta)
+        meta.pop("__vector_scale__", None)
+        meta.update(encode_vector(vector, self._encoding))
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        result = await super().upsert(data)
+        self._version += 1
+        # LightRAG appends the new entries at the end of the index with float lists as vectors
+        for fid in range(max(0, self._index.ntotal - len(data)), self._index.ntotal):
+            meta = self._id_to_meta.get(fid)
+            if meta is not None and isinstance(meta.get("__vector__"), list):
+                self._encode_meta(meta)
+        return result
+
+    def _save_faiss_index(self):
+        """Persist the index and metadata, writing float16/int8 vectors as base64"""
+        faiss.write_index(self._index, self._faiss_index_file)
+
+        serializable_dict = {}
+        for fid, meta in self._id_to_meta.items():
+            vector = meta.get("__vector__")
+            if isinstance(vector, np.ndarray):
+                meta = dict(meta)
+                if vector.dtype == np.float32:
+                    meta["__vector__"] = vector.tolist()
+                else:
+                    meta["__vector__"] = base64.b64encode(vector.tobytes()).decode("ascii")
+                    meta["__vector_dtype__"] = vector.dtype.name
+            serializable_dict[str(fid)] = meta
+
+        with open(self._meta_file, "w", encoding="utf-8") as f:
+            json.dump(serializable_dict, f)
+
+    def _load_faiss_index(self):
+        super()._load_faiss_index()
+        for meta in self._id_to_meta.values():
+            self._encode_meta(meta)
+        if self._id_to_meta and self._needs_rebuild():
+            logger.info(f"Rebuilding FAISS index for {self.namespace} as {self._index_type}/{self._encoding} "
+                        f"({len(self._id_to_meta)} vectors)")
+            self._rebuild_index()
+        else:
+            apply_search_params(self._index, self._index_params)
+            # How many vectors the loaded quantizers saw is not stored; count from here
+            self._trained_on = self._index.ntotal if is_trained_on_data(self._index) else 0
+
+    async def _remove_faiss_ids(self, fid_list):
+        """Remove entries, renumbering the rest to stay sequential like LightRAG expects
+
+        Flat indexes (plain or scalar-quantized) shift their remaining vectors
+        down in place. HNSW and IVF-PQ indexes are replaced by a flat float32
+        index until index_done_callback rebuilds the configured type.
+        """
+        remove = set(fid_list)
+        keep_fids = [fid for fid in self._id_to_meta if fid not in remove]
+        new_id_to_meta = {new_fid: self._id_to_meta[old_fid] for new_fid, old_fid in enumerate(keep_fids)}
+
+        async with self._storage_lock:
+            index_type = index_type_of(self._index)
+            if index_type == "flat":
+                self._index.remove_ids(np.array(sorted(remove), dtype=np.int64))
+            else:
+                if index_type == "ivf_pq":
+                    self._trained_index = self._index
+                self._index = build_index("flat", self._dim, self._stored_vectors(new_id_to_meta),
+                                          dict(self._index_params, encoding="float32"))
+            self._id_to_meta = new_id_to_meta
+            self._version += 1
+
+    async def warm_up(self) -> int:
+        """Run one search so the first query does not pay for paging the index in
+
+        Returns:
+            Number of vectors in the index
+        """
+        index = await self._get_index()
+        if index.ntotal:
+            query = np.full((1, self._dim), 1.0 / np.sqrt(self._dim), dtype=np.float32)
+            index.search(query, 1)
+        return index.ntotal
+
+    async def index_done_callback(self) -> bool:
+        # Build the configured index before persisting: once enough vectors exist to
+        # train it, and after removals replaced it with a flat index
+        async with self._storage_lock:
+            rebuild = self._needs_rebuild()
+            if rebuild:
+                vectors = self._stored_vectors(self._id_to_meta)
+                version = self._version
+                retrain = self._needs_retrain()
+        if rebuild:
+            logger.info(f"{'Retraining' if retrain else 'Building'} {self._index_type}/{self._encoding} "
+                        f"FAISS index for {self.namespace} from {len(vectors)} vectors")
+            # Building HNSW or training IVF-PQ takes seconds; queries keep using the current index meanwhile
+            trained = None if retrain else self._trained_index
+            index = await asyncio.to_thread(build_index, self._index_type, self._dim, vectors,
+                                            self._index_params, trained)
+            async with self._storage_lock:
+                if self._version == version:
+                    self._set_index(index, 0 if index is trained else len(vectors))
+                    self._trained_index = None
+                else:
+                    logger.info(f"FAISS index for {self.namespace} changed while it was rebuilt, "
+                                f"rebuilding at the next commit")
+        return await super().index_done_callback()
+
+
+def register_storage():
+    """Make the storage selectable through LightRAG(vector_storage=STORAGE_NAME)"""
+    STORAGES[STORAGE_NAME] = __name__
+    implementations = STORAGE_IMPLEMENTATIONS["VECTOR_STORAGE"]["implementations"]
+    if STORAGE_NAME not in implementations:
+        implementations.append(STORAGE_NAME)
+
+
+register_storage()
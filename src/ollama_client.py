@@ -3,10 +3,61 @@ import threading
 import ollama
 import numpy as np
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
+from .response_cache import ResponseCache, get_response_cache
 
 logger = logging.getLogger(__name__)
 
+class ThinkTagStripper:
+    """Incrementally removes <think>...</think> blocks from streamed text
+    
+    Text that could be the beginning of a tag is held back until the next
+    chunk shows whether it is one. Leading whitespace of the answer is dropped,
+    like _strip_thinking_tags does for complete responses.
+    """
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+    
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._started = False
+    
+    def feed(self, text: str) -> str:
+        """Add a streamed chunk and return the visible text that is now certain"""
+        self._buffer += text
+        output = []
+        while self._buffer:
+            tag = self.CLOSE_TAG if self._in_think else self.OPEN_TAG
+            index = self._buffer.find(tag)
+            if index >= 0:
+                if not self._in_think:
+                    output.append(self._buffer[:index])
+                self._buffer = self._buffer[index + len(tag):]
+                self._in_think = not self._in_think
+                continue
+            
+            # Hold back a suffix that may be the start of the tag
+            keep = next((k for k in range(min(len(tag) - 1, len(self._buffer)), 0, -1)
+                         if self._buffer.endswith(tag[:k])), 0)
+            if not self._in_think:
+                output.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            break
+        return self._emit("".join(output))
+    
+    def flush(self) -> str:
+        """Return held-back text at the end of the stream (an unterminated think block is dropped)"""
+        text = "" if self._in_think else self._buffer
+        self._buffer = ""
+        return self._emit(text)
+    
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
 class OllamaClient:
     def __init__(self, host: str = "http://localhost:11434", timeout: int = 300):
         self.host = host
@@ -29,6 +80,8 @@ class OllamaClient:
             "completion_tokens": 0
         }
         self._token_lock = threading.Lock()
+        # Persistent response cache shared by all documentation clients
+        self.response_cache = get_response_cache()
         logger.info(f"Initialized Ollama clients with host: {host}, sync_timeout: {self.sync_timeout}s, async_timeout: {self.async_timeout}s")
     
     def _strip_thinking_tags(self, text: str) -> str:
@@ -39,11 +92,19 @@ class OllamaClient:
         return cleaned_text.strip()
     
     def generate_documentation(self, content: str, system_prompt: str, model: str = None) -> str:
-        """Generate documentation for SQL content using Ollama"""
+        """Generate documentation for SQL content using Ollama, served from the response cache when possible"""
         # Import here to avoid circular import
         from .config import Config
         if model is None:
             model = Config.OLLAMA_LLM_MODEL
+        
+        cache_key = None
+        if self.response_cache:
+            cache_key = ResponseCache.make_key("ollama", model, system_prompt, content.strip())
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Documentation served from response cache")
+                return cached
             
         try:
             messages = [
@@ -77,14 +138,22 @@ class OllamaClient:
             # Clean the response by removing thinking tags
             raw_content = response['message']['content']
             cleaned_content = self._strip_thinking_tags(raw_content)
+            if cache_key and cleaned_content:
+                self.response_cache.put(cache_key, cleaned_content, {"model": model})
             return cleaned_content
             
         except Exception as e:
             logger.error(f"Error in Ollama generate_documentation: {e}")
             raise
     
-    async def chat_completion_async(self, messages: List[Dict[str, str]], model: str = None, **kwargs) -> str:
-        """Async chat completion for LightRAG integration"""
+    async def chat_completion_async(self, messages: List[Dict[str, str]], model: str = None,
+                                    usage: Dict[str, int] = None, **kwargs) -> str:
+        """Async chat completion for LightRAG integration
+        
+        Args:
+            usage: Optional dict that receives the token counts of this call, since
+                the client's token_usage is shared by concurrent calls
+        """
         # Import here to avoid circular import
         from .config import Config
         if model is None:
@@ -99,7 +168,8 @@ class OllamaClient:
             response = await self.async_client.chat(
                 model=model,
                 messages=messages,
-                options=options
+                options=options,
+                keep_alive=Config.OLLAMA_KEEP_ALIVE
             )
             
             # Track token usage if available
@@ -112,6 +182,10 @@ class OllamaClient:
                     self.token_usage["prompt_tokens"] += prompt_tokens
                     self.token_usage["completion_tokens"] += completion_tokens
                     self.token_usage["total_tokens"] += total_tokens
+                
+                if usage is not None:
+                    usage.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                 total_tokens=total_tokens)
             
             # Clean the response by removing thinking tags
             raw_content = response['message']['content']
@@ -122,6 +196,60 @@ class OllamaClient:
             logger.error(f"Error in Ollama async chat completion: {e}")
             raise
     
+    async def chat_completion_stream_async(self, messages: List[Dict[str, str]], model: str = None,
+                                           usage: Dict[str, int] = None, **kwargs) -> AsyncIterator[str]:
+        """Streaming async chat completion for LightRAG integration
+        
+        Yields the response text as it is generated, with thinking tags removed.
+        
+        Args:
+            usage: Optional dict that receives the token counts of this call once
+                the stream is exhausted
+        """
+        # Import here to avoid circular import
+        from .config import Config
+        if model is None:
+            model = Config.OLLAMA_LLM_MODEL
+        
+        options = kwargs.get("options", {})
+        # Ensure we have sufficient context
+        if "num_ctx" not in options:
+            options["num_ctx"] = Config.OLLAMA_NUM_CTX
+        
+        stripper = ThinkTagStripper()
+        try:
+            stream = await self.async_client.chat(
+                model=model,
+                messages=messages,
+                options=options,
+                stream=True,
+                keep_alive=Config.OLLAMA_KEEP_ALIVE
+            )
+            async for part in stream:
+                text = stripper.feed(part['message']['content'] or "")
+                if text:
+                    yield text
+                
+                # The final part carries the token counts of the whole response
+                if part.get('done'):
+                    prompt_tokens = part.get('prompt_eval_count') or 0
+                    completion_tokens = part.get('eval_count') or 0
+                    with self._token_lock:
+                        self.token_usage["prompt_tokens"] += prompt_tokens
+                        self.token_usage["completion_tokens"] += completion_tokens
+                        self.token_usage["total_tokens"] += prompt_tokens + completion_tokens
+                    if usage is not None:
+                        usage.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                     total_tokens=prompt_tokens + completion_tokens)
+            
+            text = stripper.flush()
+            if text:
+                yield text
+            
+        except Exception as e:
+            logger.error(f"Error in Ollama async chat stream: {e}")
+            raise
+    
     async def embed_async(self, texts: List[str], model: str = None) -> np.ndarray:
         """Async embedding generation for LightRAG integration"""
         # Import here to avoid circular import
@@ -132,7 +260,8 @@ class OllamaClient:
         try:
             response = await self.async_client.embed(
                 model=model,
-                input=texts
+                input=texts,
+                keep_alive=Config.OLLAMA_KEEP_ALIVE
             )
             
             # Note: Ollama doesn't provide token counts for embeddings
@@ -140,17 +269,46 @@ class OllamaClient:
             
             embeddings = response['embeddings']
             logger.info(f"Generated embeddings for {len(texts)} texts")
-            return np.array(embeddings)
+            return np.array(embeddings, dtype=np.float32)
             
         except Exception as e:
             logger.error(f"Error in Ollama async embed: {e}")
             raise
     
+    async def preload_async(self, model: str, embedding: bool = False):
+        """Load a model into memory and keep it loaded for OLLAMA_KEEP_ALIVE
+        
+        Args:
+            embedding: Whether the model is an embedding model (loaded through the embed endpoint)
+        """
+        # Import here to avoid circular import
+        from .config import Config
+        
+        if embedding:
+            await self.async_client.embed(model=model, input="warm-up", keep_alive=Config.OLLAMA_KEEP_ALIVE)
+        else:
+            # A generate request without a prompt only loads the model; it must use the
+            # context size of the real queries, or Ollama reloads the runner for the first one
+            await self.async_client.generate(model=model, keep_alive=Config.OLLAMA_KEEP_ALIVE,
+                                             options={"num_ctx": Config.OLLAMA_NUM_CTX})
+        logger.info(f"Loaded Ollama model {model} (keep alive {Config.OLLAMA_KEEP_ALIVE})")
+    
     def get_token_usage(self) -> dict:
         """Get current token usage statistics"""
         with self._token_lock:
             return self.token_usage.copy()
     
+    def get_cache_stats(self) -> dict:
+        """Get response cache statistics (empty if caching is disabled)"""
+        if self.response_cache:
+            return self.response_cache.get_stats()
+        return {}
+    
+    def reset_cache_stats(self):
+        """Reset response cache statistics"""
+        if self.response_cache:
+            self.response_cache.reset_stats()
+    
     def reset_token_usage(self):
         """Reset token usage statistics"""
         with self._token_lock:
@@ -0,0 +1,190 @@
+"""In-memory cache of RAG answers, invalidated whenever the index changes."""
+
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import numpy as np
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """LRU cache of RAG answers with a time-to-live and optional paraphrase matching.
+
+    Answers are keyed by the normalized query text within a scope made of the
+    query mode, the conversation history LightRAG sees and the index version.
+    invalidate() bumps the index version and drops every entry, so answers
+    computed against an older index are never served or stored.
+
+    With a similarity threshold above 0, a query that misses the exact lookup
+    is compared with the cached queries of the same scope by the cosine
+    similarity of their embeddings, and the answer of the closest one is
+    served if it reaches the threshold.
+    """
+
+    _WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float = 0.0):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached answers before LRU eviction
+            ttl_seconds: Seconds after which a cached answer expires (0 = never)
+            similarity_threshold: Minimum cosine similarity for a paraphrase hit (0 = exact matches only)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.index_version = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> entry, least recently used first
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def semantic(self) -> bool:
+        """Whether paraphrase matching is enabled (callers then pass query embeddings)"""
+        return self.similarity_threshold > 0
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """Normalize query text so that case, spacing and trailing punctuation do not matter"""
+        return cls._WHITESPACE.sub(" ", text).strip().rstrip("?!.").strip().lower()
+
+    @staticmethod
+    def _scope(mode: str, conversation_history: Optional[List[dict]], index_version: int) -> str:
+        history = json.dumps(conversation_history or [], sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(f"{mode}\0{index_version}\0{history}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry["created_at"] > self.ttl_seconds
+
+    def get(self, text: str, mode: str, conversation_history: Optional[List[dict]] = None,
+            embedding: Optional[np.ndarray] = None) -> Optional[str]:
+        """Return the cached answer for a query, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            scope = self._scope(mode, conversation_history, self.index_version)
+            key = (scope, self.normalize(text))
+
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+
+            if entry is None and embedding is not None and self.semantic:
+                key = self._find_similar(scope, embedding, now)
+                entry = self._entries.get(key) if key else None
+                if entry is not None:
+                    self._stats["semantic_hits"] += 1
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["answer"]
+
+    def _find_similar(self, scope: str, embedding: np.ndarray, now: float) -> Optional[tuple]:
+        """Return the key of the most similar live entry in the scope, if it reaches the threshold"""
+        candidates = [(key, entry["embedding"]) for key, entry in self._entries.items()
+                      if key[0] == scope and entry["embedding"] is not None and not self._expired(entry, now)]
+        if not candidates:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        matrix = np.vstack([vector for _, vector in candidates])
+        similarities = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        logger.debug(f"Query cache paraphrase match with similarity {similarities[best]:.3f}")
+        return candidates[best][0]
+
+    def put(self, text: str, mode: str, answer: str, index_version: int,
+            conversation_history: Optional[List[dict]] = None, embedding: Optional[np.ndarray] = None):
+        """Store an answer computed against the given index version.
+
+        Answers for an older index version (the index changed while the query
+        was running) are discarded.
+        """
+        with self._lock:
+            if index_version != self.index_version:
+                logger.debug("Not caching answer computed against an outdated index")
+                return
+
+            key = (self._scope(mode, conversation_history, index_version), self.normalize(text))
+            self._entries[key] = {
+                "answer": answer,
+                "created_at": time.time(),
+                "embedding": np.asarray(embedding, dtype=np.float32).ravel() if embedding is not None else None,
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self):
+        """Drop every cached answer because the index changed"""
+        with self._lock:
+            self.index_version += 1
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+        logger.info(f"Query cache invalidated ({dropped} answers dropped)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        """Reset cache hit/miss statistics (cached answers are kept)"""
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+# Singleton instance
+_query_cache: Optional[QueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Get the shared query answer cache, or None if caching is disabled"""
+    global _query_cache
+
+    if not Config.QUERY_CACHE_ENABLED:
+        return None
+
+    if _query_cache is None:
+        with _query_cache_lock:
+            # Double-check pattern
+            if _query_cache is None:
+                _query_cache = QueryCache(
+                    max_entries=Config.QUERY_CACHE_MAX_ENTRIES,
+                    ttl_seconds=Config.QUERY_CACHE_TTL_SECONDS,
+                    similarity_threshold=Config.QUERY_CACHE_SIMILARITY_THRESHOLD
+                )
+                logger.info(f"Created query cache ({Config.QUERY_CACHE_MAX_ENTRIES} answers, "
+                            f"TTL {Config.QUERY_CACHE_TTL_SECONDS:g}s, "
+                            f"similarity threshold {Config.QUERY_CACHE_SIMILARITY_THRESHOLD:g})")
+
+    return _query_cache
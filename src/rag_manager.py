@@ -1,19 +1,29 @@
+import json
+import hashlib
 import logging
 import asyncio
+import math
+import os
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from functools import partial
 import numpy as np
-from urllib.parse import quote_plus
-from openai import RateLimitError, APIConnectionError, APITimeoutError
 from lightrag import LightRAG, QueryParam
-from lightrag.utils import EmbeddingFunc, TokenTracker
+from lightrag.base import DocStatus
+from lightrag.utils import EmbeddingFunc, TokenTracker, compute_mdhash_id, clean_text, remove_think_tags
 from lightrag.kg.shared_storage import initialize_pipeline_status
+from lightrag.operate import get_keywords_from_query
 from .config import Config
-from neo4j import GraphDatabase
 from neo4j.exceptions import ServiceUnavailable, TransientError
-from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 
 logger = logging.getLogger(__name__)
 
+# Input limit of a single text for the supported embedding models
+EMBEDDING_MAX_TOKEN_SIZE = 8192
+
 # Global token tracker for standalone functions
 _global_token_tracker = None
 
@@ -22,23 +32,52 @@ def set_global_token_tracker(tracker):
     global _global_token_tracker
     _global_token_tracker = tracker
 
-# Import azure_factory for shared clients
-from .azure_factory import get_chat_client, get_embedding_client
+def _track_llm_usage(usage: dict, token_tracker=None):
+    """Record LLM token usage in the global tracker and, if given, a per-call tracker
+    
+    LightRAG forwards extra keyword arguments of its LLM function to our callbacks,
+    so concurrent queries can attribute their usage by passing token_tracker.
+    """
+    if not Config.ENABLE_TOKEN_TRACKING:
+        return
+    if _global_token_tracker:
+        _global_token_tracker.add_usage(usage)
+    if token_tracker is not None:
+        token_tracker.add_usage(usage)
+
+# Provider SDKs (openai, ollama) are imported inside the provider callbacks,
+# so only the configured provider is ever loaded
 
-# Import ollama_factory for Ollama support
-from .ollama_factory import get_ollama_client
+# Import database_factory for the shared pooled Neo4j driver and MongoDB client
+from .database_factory import get_neo4j_driver, get_mongo_client, build_mongo_uri
+
+# Persistent embedding cache shared across rebuilds and chat sessions
+from .embedding_cache import get_embedding_cache, with_embedding_cache
+from .embedding_batcher import EmbeddingBatcher, TokenAwareEmbeddingSplitter
+from .query_cache import QueryCache, get_query_cache
+from .response_cache import ResponseCache, get_keyword_cache
+from .single_flight import SingleFlight
+from .conversation_history import ConversationHistory
 
 
 # Standalone functions for LightRAG - use shared clients AND track tokens for RAG
 async def azure_llm_callback(prompt: str, system_prompt: str = None, 
                        history_messages: list = None, **kwargs) -> str:
-    """LLM function for LightRAG - uses shared Azure client with RAG token tracking"""
+    """LLM function for LightRAG - uses shared async Azure client with RAG token tracking
+    
+    The async client lets LightRAG overlap up to llm_model_max_async requests
+    instead of blocking the event loop on every call. With stream=True (final
+    answers of streamed queries) an async iterator of text chunks is returned.
+    """
+    from openai import RateLimitError, APIConnectionError, APITimeoutError
+    from .azure_factory import get_async_chat_client
+    
     if history_messages is None:
         history_messages = []
     
     try:
         # Use shared client instead of creating new one
-        client = get_chat_client()
+        client = get_async_chat_client()
             
         messages = []
         if system_prompt:
@@ -47,7 +86,18 @@ async def azure_llm_callback(prompt: str, system_prompt: str = None,
             messages.extend(history_messages)
         messages.append({"role": "user", "content": prompt})
         
-        chat_completion = client.chat.completions.create(
+        if kwargs.get("stream"):
+            stream = await client.chat.completions.create(
+                model=Config.AZURE_OPENAI_DEPLOYMENT,
+                messages=messages,
+                temperature=kwargs.get("temperature", 0),
+                top_p=kwargs.get("top_p", 1),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            return _iter_azure_stream(stream, kwargs.get("token_tracker"))
+        
+        chat_completion = await client.chat.completions.create(
             model=Config.AZURE_OPENAI_DEPLOYMENT,
             messages=messages,
             temperature=kwargs.get("temperature", 0),
@@ -55,15 +105,14 @@ async def azure_llm_callback(prompt: str, system_prompt: str = None,
             n=kwargs.get("n", 1),
         )
         
-        # Track token usage for RAG if global tracker is available
-        global _global_token_tracker
-        if _global_token_tracker and Config.ENABLE_TOKEN_TRACKING and chat_completion.usage:
+        # Track token usage for RAG (globally and for the calling query, if it passed a tracker)
+        if chat_completion.usage:
             usage = chat_completion.usage
-            _global_token_tracker.add_usage({
+            _track_llm_usage({
                 'prompt_tokens': usage.prompt_tokens,
                 'completion_tokens': usage.completion_tokens,
                 'total_tokens': usage.total_tokens
-            })
+            }, kwargs.get("token_tracker"))
             logger.debug(f"LLM tracked {usage.total_tokens} tokens for RAG")
         
         logger.info("LLM model response generated")
@@ -76,13 +125,34 @@ async def azure_llm_callback(prompt: str, system_prompt: str = None,
         logger.error(f"Unexpected error in azure_llm_callback: {e}")
         raise
 
+async def _iter_azure_stream(stream, token_tracker=None):
+    """Yield the text of a streamed Azure chat completion and track its usage at the end"""
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # With include_usage the last chunk has no choices, only the usage
+            if chunk.usage:
+                _track_llm_usage({
+                    'prompt_tokens': chunk.usage.prompt_tokens,
+                    'completion_tokens': chunk.usage.completion_tokens,
+                    'total_tokens': chunk.usage.total_tokens
+                }, token_tracker)
+                logger.debug(f"LLM stream tracked {chunk.usage.total_tokens} tokens for RAG")
+    except Exception as e:
+        logger.error(f"Azure OpenAI error while streaming: {e}")
+        raise
+
 async def embedding_func(texts: list[str]) -> np.ndarray:
-    """Generate embeddings for texts - uses shared Azure client with RAG token tracking"""
+    """Generate embeddings for texts - uses shared async Azure client with RAG token tracking"""
+    from openai import RateLimitError, APIConnectionError, APITimeoutError
+    from .azure_factory import get_async_embedding_client
+    
     try:
         # Use shared client instead of creating new one
-        client = get_embedding_client()
+        client = get_async_embedding_client()
         
-        embedding = client.embeddings.create(
+        embedding = await client.embeddings.create(
             model=Config.AZURE_EMBEDDING_DEPLOYMENT,
             input=texts
         )
@@ -100,7 +170,7 @@ async def embedding_func(texts: list[str]) -> np.ndarray:
         
         embeddings = [item.embedding for item in embedding.data]
         logger.info(f"Generated embeddings for {len(texts)} texts")
-        return np.array(embeddings)
+        return np.array(embeddings, dtype=np.float32)
         
     except (RateLimitError, APIConnectionError, APITimeoutError) as e:
         logger.error(f"Azure OpenAI API error in embedding_func: {e}")
@@ -112,7 +182,13 @@ async def embedding_func(texts: list[str]) -> np.ndarray:
 # Ollama integration functions for LightRAG
 async def ollama_llm_callback(prompt: str, system_prompt: str = None,
                             history_messages: list = None, **kwargs) -> str:
-    """LLM function for LightRAG using Ollama - includes RAG token tracking"""
+    """LLM function for LightRAG using Ollama - includes RAG token tracking
+    
+    With stream=True (final answers of streamed queries) an async iterator of
+    text chunks is returned.
+    """
+    from .ollama_factory import get_ollama_client
+    
     if history_messages is None:
         history_messages = []
     
@@ -134,20 +210,21 @@ async def ollama_llm_callback(prompt: str, system_prompt: str = None,
             "num_ctx": Config.OLLAMA_NUM_CTX  # Configurable context window
         }
         
+        if kwargs.get("stream"):
+            return _iter_ollama_stream(client, messages, options, kwargs.get("token_tracker"))
+        
+        usage = {}
         result = await client.chat_completion_async(
             messages=messages,
             model=Config.OLLAMA_LLM_MODEL,
-            options=options
+            options=options,
+            usage=usage
         )
         
-        # Track token usage for RAG if global tracker is available
-        global _global_token_tracker
-        if _global_token_tracker and Config.ENABLE_TOKEN_TRACKING:
-            # Get token usage from Ollama client
-            usage = client.get_token_usage()
-            if usage['total_tokens'] > 0:
-                _global_token_tracker.add_usage(usage)
-                logger.debug(f"Ollama LLM tracked {usage['total_tokens']} tokens for RAG")
+        # Track this call's token usage (the client's own counter is shared by concurrent calls)
+        if usage.get('total_tokens'):
+            _track_llm_usage(usage, kwargs.get("token_tracker"))
+            logger.debug(f"Ollama LLM tracked {usage['total_tokens']} tokens for RAG")
         
         logger.info("Ollama LLM model response generated")
         return result
@@ -167,8 +244,63 @@ async def ollama_llm_callback(prompt: str, system_prompt: str = None,
         
         raise
 
+async def _iter_ollama_stream(client, messages: list, options: dict, token_tracker=None):
+    """Yield the text of a streamed Ollama chat completion and track its usage at the end"""
+    usage = {}
+    async for text in client.chat_completion_stream_async(
+        messages=messages,
+        model=Config.OLLAMA_LLM_MODEL,
+        options=options,
+        usage=usage
+    ):
+        yield text
+    
+    if usage.get('total_tokens'):
+        _track_llm_usage(usage, token_tracker)
+        logger.debug(f"Ollama LLM stream tracked {usage['total_tokens']} tokens for RAG")
+
+def with_keyword_cache(func, cache: ResponseCache, model: str):
+    """Wrap an LLM function so keyword extractions of repeated queries skip the LLM
+    
+    LightRAG marks keyword extraction calls with keyword_extraction=True. The
+    prompt holds the query and the conversation history the keywords were
+    extracted for, so it is part of the key together with the model. Only
+    answers with parseable keywords are cached.
+    """
+    async def cached_llm_func(prompt: str, system_prompt: str = None, history_messages: list = None, **kwargs):
+        if not kwargs.get("keyword_extraction") or kwargs.get("stream"):
+            return await func(prompt, system_prompt=system_prompt, history_messages=history_messages, **kwargs)
+        
+        key = ResponseCache.make_key("keywords", Config.LLM_PROVIDER, model, system_prompt,
+                                     json.dumps(history_messages or []), " ".join(prompt.split()))
+        # The cache reads and writes files under a lock; keep that off the event loop
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            logger.debug("Served query keywords from keyword cache")
+            return cached
+        
+        result = await func(prompt, system_prompt=system_prompt, history_messages=history_messages, **kwargs)
+        if _has_keywords(result):
+            await asyncio.to_thread(cache.put, key, result, {"model": model})
+        return result
+    
+    return cached_llm_func
+
+def _has_keywords(result) -> bool:
+    """Whether a keyword extraction answer holds keywords LightRAG can parse"""
+    if not isinstance(result, str):
+        return False
+    match = re.search(r"\{.*?\}", remove_think_tags(result), re.DOTALL)
+    try:
+        keywords = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        return False
+    return bool(keywords.get("high_level_keywords") or keywords.get("low_level_keywords"))
+
 async def ollama_embedding_func(texts: list[str]) -> np.ndarray:
     """Generate embeddings using Ollama - includes RAG token tracking"""
+    from .ollama_factory import get_ollama_client
+    
     try:
         # Use shared Ollama client
         client = get_ollama_client()
@@ -209,6 +341,20 @@ class RAGManager:
         self.lightrag_instance = None
         self.token_tracker = TokenTracker()
         self.enable_token_tracking = Config.ENABLE_TOKEN_TRACKING
+        self.insert_batch_size = Config.INSERT_BATCH_SIZE
+        self.insert_max_parallel = Config.INSERT_MAX_PARALLEL
+        self.index_manifest_file = Config.INDEX_MANIFEST_FILE
+        self.embedding_dim = None
+        self.embedding_cache = None
+        self.keyword_cache = None
+        self.embedding_batcher = None
+        self.embedding_splitter = None
+        self.query_cache = get_query_cache()
+        self.single_flight = SingleFlight()
+        self.startup_timings = {}
+        self.warmup_timings = {}
+        self.mode_stats = {}
+        self.last_query_stats = {}
         
         # Set the global token tracker for LLM functions
         set_global_token_tracker(self.token_tracker)
@@ -216,14 +362,8 @@ class RAGManager:
     
     def clear_neo4j_database(self):
         """Clear all data from Neo4j database"""
-        driver = None
         try:
-            driver = GraphDatabase.driver(
-                Config.NEO4J_URI,
-                auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD),
-                connection_timeout=10.0,
-                max_connection_lifetime=300
-            )
+            driver = get_neo4j_driver()
             
             # Test connection before proceeding
             with driver.session(database=Config.NEO4J_DATABASE) as session:
@@ -240,22 +380,11 @@ class RAGManager:
         except Exception as e:
             logger.error(f"Failed to clear Neo4j database: {e}")
             raise
-        finally:
-            if driver:
-                driver.close()
     
     def clear_mongodb_database(self):
         """Clear all data from MongoDB database"""
-        client = None
         try:
-            # Use the same URI building logic as other methods
-            mongo_uri = self._build_mongo_uri()
-            client = MongoClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=10000,  # 10 second timeout
-                connectTimeoutMS=5000,  # 5 second connection timeout
-                socketTimeoutMS=30000   # 30 second socket timeout
-            )
+            client = get_mongo_client()
             
             # Test connection before proceeding
             client.admin.command('ping')
@@ -277,145 +406,264 @@ class RAGManager:
         except Exception as e:
             logger.error(f"Failed to clear MongoDB database: {e}")
             raise
-        finally:
-            if client:
-                client.close()
     
     async def initialize(self):
         """Initialize LightRAG with chosen LLM provider, Neo4j graph storage, and MongoDB KV/doc status storage"""
         # Configuration validation happens at application startup in main.py
         # No need to validate here again
         
+        startup_start = time.perf_counter()
+        self.startup_timings = {}
+        
+        # Database health checks run in worker threads while LightRAG is set up below
+        health_checks = asyncio.gather(
+            self._timed_startup_step("neo4j_health_check", asyncio.to_thread(self._test_neo4j_connection)),
+            self._timed_startup_step("mongodb_health_check", asyncio.to_thread(self._test_mongo_connection)),
+            return_exceptions=True
+        )
+        await asyncio.sleep(0)  # Let the health checks start before the blocking setup
+        
         try:
-            # Test database connections before initializing LightRAG
-            self._test_database_connections()
+            with self._startup_step("lightrag_setup"):
+                self._create_lightrag_instance()
             
-            # Choose LLM and embedding functions based on provider
-            if Config.LLM_PROVIDER == "azure":
-                llm_func = azure_llm_callback
-                embed_func = embedding_func
-                embed_dim = Config.EMBEDDING_DIMENSION
-                logger.info("Using Azure OpenAI for LLM and embeddings")
-            elif Config.LLM_PROVIDER == "ollama":
-                llm_func = ollama_llm_callback
-                embed_func = ollama_embedding_func
-                # For nomic-embed-text, the dimension is 768
-                embed_dim = 768 if Config.OLLAMA_EMBEDDING_MODEL.startswith("nomic-embed-text") else Config.EMBEDDING_DIMENSION
-                logger.info(f"Using Ollama for LLM ({Config.OLLAMA_LLM_MODEL}) and embeddings ({Config.OLLAMA_EMBEDDING_MODEL})")
-            else:
-                raise ValueError(f"Unknown LLM provider: {Config.LLM_PROVIDER}")
+            # Storages connect to the databases, so they wait for the health checks
+            for result in await health_checks:
+                if isinstance(result, Exception):
+                    raise result
             
-            self.lightrag_instance = LightRAG(
-                working_dir=str(self.working_dir),
-                llm_model_func=llm_func,
-                embedding_func=EmbeddingFunc(
-                    embedding_dim=embed_dim,
-                    max_token_size=8192,
-                    func=embed_func,
-                ),
-                vector_storage="FaissVectorDBStorage",
-                graph_storage="Neo4JStorage",
-                kv_storage="MongoKVStorage",
-                doc_status_storage="MongoDocStatusStorage",
+            # Storage and pipeline status initialization are independent of each other
+            await asyncio.gather(
+                self._timed_startup_step("initialize_storages", self.lightrag_instance.initialize_storages()),
+                self._timed_startup_step("initialize_pipeline_status", initialize_pipeline_status())
             )
-            
-            logger.info(f"Initialized LightRAG with {Config.LLM_PROVIDER.title()} provider, Neo4j graph storage, and MongoDB KV/doc status storage")
-            
-            await self.lightrag_instance.initialize_storages()
-            await initialize_pipeline_status()
         except Exception as e:
+            if not health_checks.done():
+                health_checks.cancel()
             logger.error(f"Failed to initialize LightRAG: {e}")
             raise
+        
+        self.startup_timings["total"] = time.perf_counter() - startup_start
+        self._log_startup_timings()
     
-    def _test_database_connections(self):
-        """Test Neo4j and MongoDB connections before initialization"""
-        # Test Neo4j connection
-        driver = None
+    def _create_lightrag_instance(self):
+        """Build the embedding function chain and the LightRAG instance (no database I/O)"""
+        # Choose LLM and embedding functions based on provider
+        if Config.LLM_PROVIDER == "azure":
+            llm_func = azure_llm_callback
+            embed_func = embedding_func
+            embed_dim = Config.EMBEDDING_DIMENSION
+            logger.info("Using Azure OpenAI for LLM and embeddings")
+        elif Config.LLM_PROVIDER == "ollama":
+            llm_func = ollama_llm_callback
+            embed_func = ollama_embedding_func
+            # For nomic-embed-text, the dimension is 768
+            embed_dim = 768 if Config.OLLAMA_EMBEDDING_MODEL.startswith("nomic-embed-text") else Config.EMBEDDING_DIMENSION
+            logger.info(f"Using Ollama for LLM ({Config.OLLAMA_LLM_MODEL}) and embeddings ({Config.OLLAMA_EMBEDDING_MODEL})")
+        else:
+            raise ValueError(f"Unknown LLM provider: {Config.LLM_PROVIDER}")
+        
+        self.embedding_dim = embed_dim
+        
+        # Serve keyword extractions of repeated queries from the persistent keyword cache
+        self.keyword_cache = get_keyword_cache()
+        if self.keyword_cache:
+            llm_func = with_keyword_cache(llm_func, self.keyword_cache, Config.get_llm_model())
+        
+        # Keep every provider call within the token budget, adapting its size after throttling
+        self.embedding_splitter = TokenAwareEmbeddingSplitter(
+            embed_func,
+            max_batch_texts=Config.EMBEDDING_BATCH_MAX_SIZE,
+            max_batch_tokens=Config.EMBEDDING_BATCH_MAX_TOKENS,
+            max_text_tokens=EMBEDDING_MAX_TOKEN_SIZE,
+            max_concurrency=Config.EMBEDDING_BATCH_CONCURRENCY
+        )
+        embed_func = self.embedding_splitter
+        
+        # Coalesce concurrent embedding calls into fewer, larger provider requests
+        if Config.EMBEDDING_BATCH_WAIT_MS > 0:
+            self.embedding_batcher = EmbeddingBatcher(
+                embed_func,
+                max_batch_size=Config.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=Config.EMBEDDING_BATCH_WAIT_MS
+            )
+            embed_func = self.embedding_batcher
+        
+        # Serve repeated texts (chunks, entities, relations, queries) from the embedding cache
+        self.embedding_cache = get_embedding_cache(Config.get_embedding_model(), embed_dim)
+        if self.embedding_cache:
+            embed_func = with_embedding_cache(embed_func, self.embedding_cache)
+        
+        # Our FAISS storage subclass applies the index type and keeps raw vectors as
+        # float32 (or quantized) arrays instead of lists of Python floats
+        from .faiss_storage import STORAGE_NAME
+        vector_storage = STORAGE_NAME
+        logger.info(f"Using {Config.FAISS_INDEX_TYPE} FAISS index with {Config.FAISS_VECTOR_ENCODING} vectors")
+        
+        self.lightrag_instance = LightRAG(
+            working_dir=str(self.working_dir),
+            llm_model_func=llm_func,
+            embedding_func=EmbeddingFunc(
+                embedding_dim=embed_dim,
+                max_token_size=EMBEDDING_MAX_TOKEN_SIZE,
+                func=embed_func,
+            ),
+            vector_storage=vector_storage,
+            graph_storage="Neo4JStorage",
+            kv_storage="MongoKVStorage",
+            doc_status_storage="MongoDocStatusStorage",
+            max_parallel_insert=self.insert_max_parallel,
+            llm_model_max_async=Config.LLM_MAX_ASYNC,
+            embedding_func_max_async=Config.EMBEDDING_MAX_ASYNC,
+        )
+        
+        logger.info(f"Initialized LightRAG with {Config.LLM_PROVIDER.title()} provider, Neo4j graph storage, and MongoDB KV/doc status storage")
+    
+    @contextmanager
+    def _startup_step(self, name: str):
+        """Record the duration of a synchronous startup step"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = time.perf_counter() - start
+    
+    async def _timed_startup_step(self, name: str, awaitable):
+        """Await a startup step and record its duration"""
+        start = time.perf_counter()
         try:
-            driver = GraphDatabase.driver(
-                Config.NEO4J_URI,
-                auth=(Config.NEO4J_USERNAME, Config.NEO4J_PASSWORD),
-                connection_timeout=10.0
+            return await awaitable
+        finally:
+            self.startup_timings[name] = time.perf_counter() - start
+    
+    def _log_startup_timings(self):
+        """Log per-step startup durations (visible with --debug)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        lines = ["Startup timing (health checks overlap LightRAG setup; storages overlap pipeline status):"]
+        for name, seconds in self.startup_timings.items():
+            lines.append(f"  {name:<28} {seconds * 1000:8.1f} ms")
+        logger.debug("\n".join(lines))
+    
+    def get_startup_timings(self) -> dict:
+        """Get the duration in seconds of each step of the last initialize() call"""
+        return self.startup_timings.copy()
+    
+    async def warm_up(self, queries: list = None):
+        """Load models, vector indexes and caches before the first query
+        
+        Preloads the Ollama chat and embedding models with OLLAMA_KEEP_ALIVE,
+        searches each FAISS index once, then answers the priming queries one
+        after another, which also warms the Neo4j page cache and the keyword
+        cache. Each step's duration is logged and available from
+        get_warmup_timings().
+        
+        Args:
+            queries: Optional list of (mode, question) tuples to answer
+        """
+        if not self.lightrag_instance:
+            raise RuntimeError("RAG not initialized. Call initialize() first.")
+        
+        warmup_start = time.perf_counter()
+        self.warmup_timings = {}
+        
+        async def timed(name, awaitable):
+            start = time.perf_counter()
+            try:
+                return await awaitable
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed: {e}")
+            finally:
+                self.warmup_timings[name] = time.perf_counter() - start
+        
+        if Config.LLM_PROVIDER == "ollama":
+            from .ollama_factory import get_ollama_client
+            client = get_ollama_client()
+            await asyncio.gather(
+                timed("llm_model", client.preload_async(Config.OLLAMA_LLM_MODEL)),
+                timed("embedding_model", client.preload_async(Config.OLLAMA_EMBEDDING_MODEL, embedding=True))
             )
+        
+        for name in ("entities_vdb", "relationships_vdb", "chunks_vdb"):
+            storage = getattr(self.lightrag_instance, name, None)
+            if hasattr(storage, "warm_up"):
+                await timed(name.replace("_vdb", "_index"), storage.warm_up())
+        
+        for number, (mode, question) in enumerate(queries or [], start=1):
+            await timed(f"query_{number}_{mode}", self.query_with_stats(question, mode))
+        
+        self.warmup_timings["total"] = time.perf_counter() - warmup_start
+        lines = ["Warm-up timing:"]
+        for name, seconds in self.warmup_timings.items():
+            lines.append(f"  {name:<28} {seconds * 1000:8.1f} ms")
+        logger.info("\n".join(lines))
+    
+    def get_warmup_timings(self) -> dict:
+        """Get the duration in seconds of each step of the last warm_up() call"""
+        return self.warmup_timings.copy()
+    
+    def _test_neo4j_connection(self):
+        """Test the Neo4j connection before initialization"""
+        try:
+            driver = get_neo4j_driver()
             with driver.session(database=Config.NEO4J_DATABASE) as session:
                 session.run("RETURN 1")
             logger.info("Neo4j connection test successful")
         except Exception as e:
             logger.error(f"Neo4j connection test failed: {e}")
             raise ConnectionError(f"Cannot connect to Neo4j: {e}")
-        finally:
-            if driver:
-                driver.close()
-        
-        # Test MongoDB connection
-        client = None
+    
+    def _test_mongo_connection(self):
+        """Test the MongoDB connection before initialization"""
         try:
-            # Use MongoDB URI directly if it already contains credentials
-            mongo_uri = self._build_mongo_uri()
-            logger.info(f"Using MongoDB URI for connection test: {mongo_uri}")
-            client = MongoClient(
-                mongo_uri,
-                serverSelectionTimeoutMS=10000
-            )
+            logger.info(f"Using MongoDB URI for connection test: {build_mongo_uri()}")
+            client = get_mongo_client()
             client.admin.command('ping')
             logger.info("MongoDB connection test successful")
         except Exception as e:
             logger.error(f"MongoDB connection test failed: {e}")
             raise ConnectionError(f"Cannot connect to MongoDB: {e}")
-        finally:
-            if client:
-                client.close()
-    
-    def _build_mongo_uri(self) -> str:
-        """Build MongoDB URI, handling cases where credentials are already in URI or need to be added"""
-        base_uri = Config.MONGO_URI
-        
-        # Check if URI already contains credentials (has @ symbol)
-        if '@' in base_uri:
-            # URI already contains credentials, use as-is
-            logger.debug("Using MongoDB URI with embedded credentials")
-            return base_uri
-        
-        # URI doesn't contain credentials, add them if available
-        if Config.MONGO_USER and Config.MONGO_PASS:
-            # Properly escape credentials
-            escaped_user = quote_plus(Config.MONGO_USER)
-            escaped_pass = quote_plus(Config.MONGO_PASS)
-            
-            # Remove mongodb:// prefix, add credentials, then re-add prefix
-            uri_without_scheme = base_uri.replace('mongodb://', '').replace('mongodb+srv://', '')
-            scheme = 'mongodb+srv://' if base_uri.startswith('mongodb+srv://') else 'mongodb://'
-            
-            mongo_uri = f"{scheme}{escaped_user}:{escaped_pass}@{uri_without_scheme}"
-            logger.debug("Built MongoDB URI with separate user/pass credentials")
-            return mongo_uri
-        else:
-            # No credentials provided, use URI as-is
-            logger.debug("Using MongoDB URI without credentials")
-            return base_uri
     
-    async def insert_documents(self):
-        """Insert all markdown documents into RAG storage with enhanced error handling"""
+    async def insert_documents(self, queue: asyncio.Queue = None, md_files: list = None):
+        """Insert all markdown documents into RAG storage with enhanced error handling
+        
+        Args:
+            queue: Optional queue of document paths for pipelined ingestion. Documents
+                are inserted as they arrive until a None sentinel is received, instead
+                of scanning the working directory up front.
+            md_files: Optional explicit list of documents to insert instead of every
+                markdown file in the working directory.
+        """
         if not self.lightrag_instance:
             raise RuntimeError("RAG not initialized. Call initialize() first.")
         
         # Reset token tracker for insert operation
         self.reset_token_tracker()
         
-        # Get list of files to process
-        md_files = list(self.working_dir.rglob("*.md"))
-        total_files = len(md_files)
-        logger.info(f"Starting document insertion for {total_files} files")
+        if queue is not None:
+            logger.info("Starting pipelined document insertion")
+            process = self._process_document_queue(queue)
+        else:
+            # Get list of files to process
+            if md_files is None:
+                md_files = list(self.working_dir.rglob("*.md"))
+            logger.info(f"Starting document insertion for {len(md_files)} files")
+            process = self._process_documents(md_files)
         
         successful_insertions = 0
         failed_insertions = []
         
         # Use context manager if token tracking is enabled
-        if self.enable_token_tracking:
-            with self.token_tracker:
-                successful_insertions, failed_insertions = await self._process_documents(md_files)
-        else:
-            successful_insertions, failed_insertions = await self._process_documents(md_files)
+        try:
+            if self.enable_token_tracking:
+                with self.token_tracker:
+                    successful_insertions, failed_insertions, total_files = await process
+            else:
+                successful_insertions, failed_insertions, total_files = await process
+        finally:
+            # Cached answers were computed against the previous index
+            if self.query_cache:
+                self.query_cache.invalidate()
         
         # Log summary
         logger.info(f"Document insertion completed: {successful_insertions}/{total_files} successful")
@@ -427,109 +675,546 @@ class RAGManager:
             usage = self.token_tracker.get_usage()
             logger.info(f"Token usage for document insertion: {usage}")
         
+        # Persist newly cached embeddings and report the hit rate
+        if self.embedding_cache:
+            await asyncio.to_thread(self.embedding_cache.flush)
+            stats = self.embedding_cache.get_stats()
+            logger.info(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                        f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} cached vectors")
+        
+        stats = self.get_embedding_batch_stats()
+        if stats.get("provider_calls"):
+            logger.info(f"Embedding batching: {stats.get('requests', stats['provider_calls'])} requests sent in "
+                        f"{stats['provider_calls']} provider calls ({stats['retries']} retries, "
+                        f"{stats['throttled']} throttled, {stats['timeouts']} timeouts, "
+                        f"current limit {stats['batch_texts_limit']} texts per call)")
+        
         # Raise exception if all insertions failed
         if successful_insertions == 0 and total_files > 0:
             raise RuntimeError(f"Failed to insert any documents. Check Ollama server status and configuration.")
+        
+        await self._write_index_manifest()
+    
+    async def sync_documents(self):
+        """Incrementally synchronize the RAG index with the markdown files in the working directory
+        
+        Documents are matched to the doc status store by file name and content hash
+        (LightRAG document IDs are MD5 hashes of the content). New documents are
+        inserted, changed ones are deleted and re-inserted, documents whose file is
+        gone are deleted, and unchanged processed documents are left alone.
+        """
+        if not self.lightrag_instance:
+            raise RuntimeError("RAG not initialized. Call initialize() first.")
+        
+        indexed = await self._get_indexed_documents()
+        md_files = list(self.working_dir.rglob("*.md"))
+        current_names = {md_file.name for md_file in md_files}
+        
+        to_insert = []
+        to_delete = []
+        unchanged = 0
+        for md_file in md_files:
+            try:
+                with open(md_file, encoding="utf-8") as doc:
+                    doc_id = compute_mdhash_id(clean_text(doc.read()), prefix="doc-")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to read document {md_file.name}: {e}")
+                continue
+            
+            versions = indexed.get(md_file.name, {})
+            if versions.get(doc_id) == DocStatus.PROCESSED and len(versions) == 1:
+                unchanged += 1
+                continue
+            # Drop every other indexed version of this file before re-inserting it
+            to_delete.extend(other_id for other_id in versions if other_id != doc_id)
+            to_insert.append(md_file)
+        
+        for file_path, versions in indexed.items():
+            if file_path not in current_names:
+                to_delete.extend(versions)
+        
+        logger.info(f"Incremental sync: {len(to_insert)} documents to insert, "
+                    f"{len(to_delete)} indexed documents to delete, {unchanged} unchanged")
+        
+        failed_deletions = []
+        for doc_id in to_delete:
+            try:
+                result = await self.lightrag_instance.adelete_by_doc_id(doc_id)
+                if result.status == "success":
+                    logger.info(f"Deleted indexed document {doc_id} ({result.file_path})")
+                elif result.status == "not_found":
+                    logger.debug(f"Indexed document {doc_id} was already deleted")
+                else:
+                    logger.error(f"Failed to delete indexed document {doc_id}: {result.message}")
+                    failed_deletions.append(doc_id)
+            except Exception as e:
+                logger.error(f"Failed to delete indexed document {doc_id}: {e}")
+                failed_deletions.append(doc_id)
+        
+        if failed_deletions:
+            logger.warning(f"Failed to delete {len(failed_deletions)} outdated documents: {failed_deletions}")
+        
+        if to_delete and self.query_cache:
+            self.query_cache.invalidate()
+        
+        if to_insert:
+            await self.insert_documents(md_files=to_insert)
+        else:
+            logger.info("RAG index is up to date, no documents to insert")
+            await self._write_index_manifest()
+    
+    async def ensure_index_current(self):
+        """Attach to the existing RAG index, re-ingesting documents only if it is stale
+        
+        The index is considered current when the index manifest written after the
+        last ingestion matches the embedding settings, the markdown files in the
+        working directory, the processed documents in the doc status store, and
+        the FAISS index files exist. Otherwise the index is synchronized
+        incrementally with sync_documents.
+        """
+        if not self.lightrag_instance:
+            raise RuntimeError("RAG not initialized. Call initialize() first.")
+        
+        reason = await self._get_index_staleness()
+        if reason is None:
+            logger.info("Attached to existing RAG index without re-inserting documents")
+            return
+        
+        logger.info(f"RAG index is stale ({reason}), synchronizing documents")
+        await self.sync_documents()
+    
+    def _get_index_settings(self) -> dict:
+        """Settings that make an existing index unusable when they change"""
+        return {
+            "provider": Config.LLM_PROVIDER,
+            "embedding_model": Config.get_embedding_model(),
+            "embedding_dim": self.embedding_dim,
+        }
+    
+    def _get_working_dir_doc_ids(self) -> dict:
+        """Map markdown file names in the working directory to their LightRAG document IDs"""
+        doc_ids = {}
+        for md_file in self.working_dir.rglob("*.md"):
+            try:
+                with open(md_file, encoding="utf-8") as doc:
+                    doc_ids[md_file.name] = compute_mdhash_id(clean_text(doc.read()), prefix="doc-")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to read document {md_file.name}: {e}")
+        return doc_ids
+    
+    async def _get_index_staleness(self):
+        """Return the reason the existing index is stale, or None if it is current"""
+        try:
+            with open(self.index_manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return "no index manifest"
+        except (OSError, ValueError) as e:
+            return f"unreadable index manifest: {e}"
+        
+        if manifest.get("settings") != self._get_index_settings():
+            return "embedding settings changed"
+        
+        if not any(self.working_dir.rglob("faiss_index_*.index")):
+            return "FAISS index files missing"
+        
+        documents = manifest.get("documents", {})
+        if self._get_working_dir_doc_ids() != documents:
+            return "documents in working directory changed"
+        
+        indexed = await self._get_indexed_documents()
+        processed = {
+            file_path: doc_id
+            for file_path, versions in indexed.items()
+            for doc_id, status in versions.items()
+            if status == DocStatus.PROCESSED
+        }
+        if processed != documents or sum(len(versions) for versions in indexed.values()) != len(documents):
+            return "document status store does not match the manifest"
+        
+        return None
+    
+    async def _write_index_manifest(self):
+        """Record the processed documents and embedding settings of the current index"""
+        try:
+            indexed = await self._get_indexed_documents()
+            doc_ids = self._get_working_dir_doc_ids()
+            documents = {
+                name: doc_id
+                for name, doc_id in doc_ids.items()
+                if indexed.get(name, {}).get(doc_id) == DocStatus.PROCESSED
+            }
+            manifest = {"version": 1, "settings": self._get_index_settings(), "documents": documents}
+            
+            tmp_file = self.index_manifest_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.index_manifest_file)
+            logger.info(f"Saved index manifest with {len(documents)} documents to {self.index_manifest_file}")
+        except Exception as e:
+            # A missing manifest only costs a synchronization on the next chat start
+            logger.error(f"Failed to save index manifest {self.index_manifest_file}: {e}")
+    
+    async def _get_indexed_documents(self) -> dict:
+        """Map file names to {doc_id: status} for every document in the doc status store"""
+        indexed = {}
+        for status in DocStatus:
+            docs = await self.lightrag_instance.get_docs_by_status(status)
+            for doc_id, doc in docs.items():
+                indexed.setdefault(doc.file_path, {})[doc_id] = status
+        return indexed
     
     async def _process_documents(self, md_files):
-        """Process documents with individual error handling"""
+        """Process documents in batches of INSERT_BATCH_SIZE with individual error handling"""
         successful_insertions = 0
         failed_insertions = []
+        batch_size = self.insert_batch_size
         
-        for i, md_file in enumerate(md_files, 1):
-            try:
-                logger.info(f"Processing document {i}/{len(md_files)}: {md_file.name}")
-                
-                with open(md_file, encoding="utf-8") as doc:
-                    content = doc.read()
-                    
-                # Insert with timeout monitoring
-                # Use asyncio timeout to prevent hanging on LightRAG operations
-                insert_timeout = int(Config.OLLAMA_TIMEOUT) * 2  # Double the Ollama timeout for complex operations
-                logger.info(f"Starting LightRAG insert for {md_file.name} with {insert_timeout}s timeout")
+        for start in range(0, len(md_files), batch_size):
+            batch = md_files[start:start + batch_size]
+            if len(batch) == 1:
+                logger.info(f"Processing document {start + 1}/{len(md_files)}: {batch[0].name}")
+            else:
+                logger.info(f"Processing documents {start + 1}-{start + len(batch)}/{len(md_files)}")
+            
+            inserted, failed, stop = await self._insert_batch(batch)
+            successful_insertions += len(inserted)
+            failed_insertions.extend(failed)
+            
+            if stop:
+                # If connection is lost, break the loop to avoid further failures
+                logger.error("Stopping document processing due to connection issues")
+                break
+        
+        return successful_insertions, failed_insertions, len(md_files)
+    
+    async def _process_document_queue(self, queue: asyncio.Queue):
+        """Process documents from a queue until a None sentinel, with individual error handling
+        
+        Documents already waiting in the queue are grouped into batches of up to
+        INSERT_BATCH_SIZE. The queue is always drained to the sentinel, even after
+        a connection failure, so a producer blocked on a full queue can finish.
+        """
+        successful_insertions = 0
+        failed_insertions = []
+        received = 0
+        skipped = 0
+        connection_lost = False
+        done = False
+        
+        while not done:
+            md_file = await queue.get()
+            if md_file is None:
+                break
+            
+            batch = [md_file]
+            while len(batch) < self.insert_batch_size:
                 try:
-                    await asyncio.wait_for(
-                        self.lightrag_instance.ainsert([content], file_paths=[md_file.name]),
-                        timeout=insert_timeout
-                    )
-                    logger.info(f"Successfully inserted documentation from {md_file}")
-                except asyncio.TimeoutError:
-                    raise TimeoutError(f"LightRAG insert timed out after {insert_timeout}s for {md_file.name} - likely stuck in knowledge graph extraction")
-                successful_insertions += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to insert document {md_file.name}: {e}")
-                failed_insertions.append(md_file)
-                
-                # Log specific guidance based on error type
-                error_type = type(e).__name__
-                if "ReadTimeout" in error_type or "TimeoutException" in error_type:
-                    logger.warning(f"Document {md_file.name} caused timeout - consider splitting large documents")
-                elif "ConnectTimeout" in error_type or "ConnectionError" in error_type:
-                    logger.error(f"Connection lost during {md_file.name} processing - check Ollama server")
-                    # If connection is lost, break the loop to avoid further failures
-                    logger.error("Stopping document processing due to connection issues")
+                    md_file = queue.get_nowait()
+                except asyncio.QueueEmpty:
                     break
-                
-                # Continue with next document unless it's a connection issue
+                if md_file is None:
+                    done = True
+                    break
+                batch.append(md_file)
+            received += len(batch)
+            
+            if connection_lost:
+                skipped += len(batch)
                 continue
+            
+            logger.info(f"Processing {len(batch)} document(s) (pipelined, {received} received so far)")
+            inserted, failed, stop = await self._insert_batch(batch)
+            successful_insertions += len(inserted)
+            failed_insertions.extend(failed)
+            
+            if stop:
+                logger.error("Stopping document processing due to connection issues")
+                connection_lost = True
         
-        return successful_insertions, failed_insertions
+        if skipped:
+            logger.warning(f"Skipped {skipped} documents after connection loss")
+        
+        return successful_insertions, failed_insertions, received - skipped
     
-    async def query(self, text: str, mode: str = "hybrid", conversation_history: list = None, track_tokens: bool = True) -> str:
-        """Query the RAG system with optional conversation history and token tracking"""
+    async def _insert_batch(self, md_files: list):
+        """Insert a batch of documents, isolating failures per file
+        
+        If a multi-document batch raises, its documents are retried one by one so
+        a single bad document cannot fail the others.
+        
+        Returns:
+            Tuple of (inserted files, failed files, whether processing should stop)
+        """
+        try:
+            failed = await self._insert_document_batch(md_files)
+        except Exception as e:
+            if len(md_files) > 1 and not self._is_connection_error(e):
+                logger.warning(f"Batch insert of {len(md_files)} documents failed ({e}), retrying documents individually")
+                inserted, failed = [], []
+                for md_file in md_files:
+                    file_inserted, file_failed, stop = await self._insert_batch([md_file])
+                    inserted.extend(file_inserted)
+                    failed.extend(file_failed)
+                    if stop:
+                        return inserted, failed, True
+                return inserted, failed, False
+            
+            stop = False
+            for md_file in md_files:
+                stop = self._handle_insert_error(md_file, e) or stop
+            return [], list(md_files), stop
+        
+        return [f for f in md_files if f not in failed], failed, False
+    
+    async def _insert_document_batch(self, md_files: list) -> list:
+        """Insert markdown documents into LightRAG with one ainsert call and a timeout
+        
+        LightRAG processes the documents of one call concurrently, up to
+        INSERT_MAX_PARALLEL at a time. Extraction errors inside LightRAG do not
+        raise, so the document status store is checked afterwards.
+        
+        Returns:
+            List of files that could not be read or that LightRAG marked as failed
+        """
+        failed = []
+        files, contents = [], []
+        for md_file in md_files:
+            try:
+                with open(md_file, encoding="utf-8") as doc:
+                    contents.append(doc.read())
+                files.append(md_file)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to read document {md_file.name}: {e}")
+                failed.append(md_file)
+        
+        if not files:
+            return failed
+        
+        # Insert with timeout monitoring
+        # Use asyncio timeout to prevent hanging on LightRAG operations
+        rounds = math.ceil(len(files) / self.insert_max_parallel)
+        insert_timeout = int(Config.OLLAMA_TIMEOUT) * 2 * rounds  # Double the Ollama timeout for complex operations
+        names = ", ".join(f.name for f in files)
+        logger.info(f"Starting LightRAG insert for {names} with {insert_timeout}s timeout")
+        try:
+            await asyncio.wait_for(
+                self.lightrag_instance.ainsert(contents, file_paths=[f.name for f in files]),
+                timeout=insert_timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"LightRAG insert timed out after {insert_timeout}s for {names} - likely stuck in knowledge graph extraction")
+        
+        # Same document IDs as LightRAG generates for content without explicit IDs
+        doc_ids = [compute_mdhash_id(clean_text(content), prefix="doc-") for content in contents]
+        statuses = await self.lightrag_instance.aget_docs_by_ids(doc_ids)
+        for md_file, doc_id in zip(files, doc_ids):
+            status = statuses.get(doc_id)
+            if status is not None and status.status == DocStatus.FAILED:
+                logger.error(f"Failed to insert document {md_file.name}: {status.error}")
+                failed.append(md_file)
+            else:
+                logger.info(f"Successfully inserted documentation from {md_file}")
+        
+        return failed
+    
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """Check whether an insert error indicates a lost connection"""
+        error_type = type(error).__name__
+        return "ConnectTimeout" in error_type or "ConnectionError" in error_type
+    
+    def _handle_insert_error(self, md_file, error: Exception) -> bool:
+        """Log a failed insertion with guidance; returns True if processing should stop"""
+        logger.error(f"Failed to insert document {md_file.name}: {error}")
+        
+        # Log specific guidance based on error type
+        error_type = type(error).__name__
+        if "ReadTimeout" in error_type or "TimeoutException" in error_type:
+            logger.warning(f"Document {md_file.name} caused timeout - consider splitting large documents")
+        elif self._is_connection_error(error):
+            logger.error(f"Connection lost during {md_file.name} processing - check Ollama server")
+            return True
+        return False
+    
+    async def query(self, text: str, mode: str = "hybrid", conversation_history: list = None,
+                    track_tokens: bool = True, stream: bool = False):
+        """Query the RAG system with optional conversation history and token tracking
+        
+        Answers already computed against the current index for the same query,
+        mode and conversation history are served from the query cache without
+        any LLM or embedding tokens.
+        
+        With stream=True an async iterator of answer chunks is returned instead
+        of a string; time to first token and total latency are available from
+        get_last_query_stats() once it is exhausted.
+        """
         if not self.lightrag_instance:
             raise RuntimeError("RAG not initialized. Call initialize() first.")
         
+        if stream:
+            return self._stream_query(text, mode, conversation_history, track_tokens)
+        
+        # Reset token tracker for this query to get per-query usage
+        if self.enable_token_tracking and track_tokens:
+            self.token_tracker.reset()
+        
+        result = await self.query_with_stats(text, mode, conversation_history)
+        
+        # Log token usage for this query
+        if self.enable_token_tracking and track_tokens and not result["cached"]:
+            usage = self.token_tracker.get_usage()
+            logger.info(f"Token usage for query (mode={mode}): {usage}")
+        
+        return result["answer"]
+    
+    async def _stream_query(self, text: str, mode: str, conversation_history: list, track_tokens: bool):
+        """Async generator behind query(stream=True)"""
+        start = time.perf_counter()
+        self.last_query_stats = {"time_to_first_token_ms": None, "latency_ms": None, "cached": False,
+                                 "error": None}
+        chunks = []
+        
         try:
-            params = QueryParam(mode=mode, enable_rerank=False)
-            if conversation_history:
-                params.conversation_history = conversation_history
-            
             # Reset token tracker for this query to get per-query usage
             if self.enable_token_tracking and track_tokens:
                 self.token_tracker.reset()
             
-            result = await self.lightrag_instance.aquery(text, param=params)
-            
-            # Log token usage for this query
-            if self.enable_token_tracking and track_tokens:
-                usage = self.token_tracker.get_usage()
-                logger.info(f"Token usage for query (mode={mode}): {usage}")
+            cached, cache_context = await self._get_cached_answer(text, mode, conversation_history)
+            if cached is not None:
+                self.last_query_stats["cached"] = True
+                response = cached
+            else:
+                params = self._query_params(mode, conversation_history, stream=True)
+                response = await self.lightrag_instance.aquery(text, param=params)
             
-            return result
+            # LightRAG returns a plain string for its own cache hits and when it finds no context
+            if isinstance(response, str):
+                self.last_query_stats["time_to_first_token_ms"] = (time.perf_counter() - start) * 1000
+                chunks.append(response)
+                yield response
+            else:
+                async for chunk in response:
+                    if not chunks:
+                        self.last_query_stats["time_to_first_token_ms"] = (time.perf_counter() - start) * 1000
+                    chunks.append(chunk)
+                    yield chunk
             
         except Exception as e:
+            # The chunks already yielded are an incomplete answer; flag it so it is
+            # neither cached here nor added to the conversation history by the caller
             logger.error(f"Error querying in {mode} mode: {e}")
-            return f"Error: {str(e)}"
+            self.last_query_stats["error"] = str(e)
+            yield f"\nError: {str(e)}" if chunks else f"Error: {str(e)}"
+            return
+        
+        self.last_query_stats["latency_ms"] = (time.perf_counter() - start) * 1000
+        first_token_ms = self.last_query_stats["time_to_first_token_ms"]
+        first_token = f"{first_token_ms:.0f} ms" if first_token_ms is not None else "n/a (empty answer)"
+        logger.info(f"Streamed {mode} answer: first token after {first_token}, "
+                    f"complete after {self.last_query_stats['latency_ms']:.0f} ms")
+        
+        # Log token usage for this query
+        if self.enable_token_tracking and track_tokens:
+            usage = self.token_tracker.get_usage()
+            logger.info(f"Token usage for query (mode={mode}): {usage}")
+        
+        if cached is None:
+            self._cache_answer(cache_context, "".join(chunks))
+    
+    @staticmethod
+    def _query_params(mode: str, conversation_history: list = None, **kwargs) -> QueryParam:
+        """Build the LightRAG query parameters for a mode and conversation history
+        
+        LightRAG only puts the last history_turns turns of the history into its
+        prompts (none by default), so it is set to cover the whole history;
+        callers keep the history within budget with ConversationHistory.
+        """
+        params = QueryParam(mode=mode, enable_rerank=False, **kwargs)
+        if conversation_history:
+            params.conversation_history = conversation_history
+            params.history_turns = (len(conversation_history) + 1) // 2
+        return params
+    
+    def get_last_query_stats(self) -> dict:
+        """Get time to first token and latency of the last streamed query
+        
+        Returns:
+            Dictionary with time_to_first_token_ms, latency_ms (both None if the
+            stream failed or was not exhausted), whether the answer was cached and
+            error (the error message if the stream failed, in which case the
+            answer is incomplete)
+        """
+        return dict(self.last_query_stats)
+    
+    async def _get_cached_answer(self, text: str, mode: str, conversation_history: list = None):
+        """Look up a query in the query cache
+        
+        Returns:
+            Tuple of the cached answer (None on a miss) and the context needed to
+            cache the answer with _cache_answer once it has been computed
+        """
+        if not self.query_cache:
+            return None, None
+        
+        start = time.perf_counter()
+        # Remember the index version now so an answer racing with an ingestion is not cached
+        index_version = self.query_cache.index_version
+        history = list(conversation_history or [])
+        
+        embedding = None
+        if self.query_cache.semantic:
+            try:
+                embedding = (await self.lightrag_instance.embedding_func([text]))[0]
+            except Exception as e:
+                logger.warning(f"Query cache paraphrase lookup skipped, embedding failed: {e}")
+        
+        answer = self.query_cache.get(text, mode, history, embedding)
+        if answer is not None:
+            logger.info(f"Served {mode} query from query cache in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return answer, (text, mode, history, index_version, embedding)
+    
+    def _cache_answer(self, cache_context, answer):
+        """Store a computed answer in the query cache"""
+        if cache_context is None or not isinstance(answer, str) or not answer.strip():
+            return
+        text, mode, history, index_version, embedding = cache_context
+        self.query_cache.put(text, mode, answer, index_version, history, embedding)
     
     async def query_all_modes(self, text: str, conversation_history: list = None) -> dict:
-        """Query using all available modes and return results"""
+        """Query using all available modes concurrently and return results
+        
+        Keywords are extracted once, when the first of the local, global and
+        hybrid modes misses the query cache, and shared by all three. Each
+        mode's latency and LLM token usage are available afterwards
+        from get_mode_stats(); the total (including query embeddings) is in
+        get_token_usage().
+        """
         if not self.lightrag_instance:
             raise RuntimeError("RAG not initialized. Call initialize() first.")
         
-        results = {}
         modes = ["naive", "local", "global", "hybrid"]
+        history = list(conversation_history or [])
         
         # Reset token tracker for all-modes query
         self.reset_token_tracker()
+        self.mode_stats = {}
         
-        for mode in modes:
-            try:
-                params = QueryParam(mode=mode, enable_rerank=False)
-                if conversation_history:
-                    params.conversation_history = conversation_history
-                    
-                # Track tokens per mode
-                if self.enable_token_tracking:
-                    with self.token_tracker:
-                        results[mode] = await self.lightrag_instance.aquery(text, param=params)
-                else:
-                    results[mode] = await self.lightrag_instance.aquery(text, param=params)
-                    
-            except Exception as e:
-                logger.error(f"Error querying in {mode} mode: {e}")
-                results[mode] = f"Error: {str(e)}"
+        keywords_task = None
+        
+        def shared_keywords():
+            nonlocal keywords_task
+            if keywords_task is None:
+                keywords_task = asyncio.ensure_future(self._extract_shared_keywords(text, history))
+            return keywords_task
+        
+        start = time.perf_counter()
+        answers = await asyncio.gather(*[self._query_mode(text, mode, history, shared_keywords) for mode in modes])
+        results = dict(zip(modes, answers))
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"All modes answered in {elapsed_ms:.0f} ms ("
+                    + ", ".join(f"{mode} {self.mode_stats[mode]['latency_ms']:.0f} ms" for mode in modes) + ")")
         
         # Log total token usage for all modes
         if self.enable_token_tracking:
@@ -538,12 +1223,194 @@ class RAGManager:
         
         return results
     
+    async def _extract_shared_keywords(self, text: str, conversation_history: list):
+        """Extract the high- and low-level keywords of a query once for all graph modes
+        
+        Returns:
+            Tuple of (hl_keywords, ll_keywords), or None if extraction failed and
+            every mode should extract its own keywords
+        """
+        tracker = TokenTracker()
+        start = time.perf_counter()
+        try:
+            params = self._query_params("hybrid", conversation_history,
+                                        model_func=partial(self.lightrag_instance.llm_model_func,
+                                                           _priority=5, token_tracker=tracker))
+            keywords = await get_keywords_from_query(text, params, asdict(self.lightrag_instance),
+                                                     self.lightrag_instance.llm_response_cache)
+        except Exception as e:
+            logger.warning(f"Shared keyword extraction failed, each mode extracts its own keywords: {e}")
+            keywords = None
+        
+        self.mode_stats["keywords"] = {
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "tokens": tracker.get_usage(),
+            "cached": False,
+        }
+        return keywords
+    
+    async def _query_mode(self, text: str, mode: str, conversation_history: list, shared_keywords) -> str:
+        """Answer a query in one mode, recording its latency and token usage in mode_stats
+        
+        Args:
+            shared_keywords: Callable returning the awaitable shared keyword extraction
+        """
+        result = await self.query_with_stats(text, mode, conversation_history, shared_keywords)
+        self.mode_stats[mode] = {key: result[key] for key in ("latency_ms", "tokens", "cached")}
+        return result["answer"]
+    
+    async def query_with_stats(self, text: str, mode: str = "hybrid", conversation_history: list = None,
+                               shared_keywords=None) -> dict:
+        """Answer a query with its own latency and LLM token accounting
+        
+        Unlike query(), this does not use the shared token tracker, so any
+        number of queries can run concurrently and each reports its own usage.
+        Identical concurrent queries (same normalized text, mode and history)
+        share one computation; the callers that joined it report no tokens.
+        
+        Args:
+            shared_keywords: Optional callable returning an awaitable of
+                (hl_keywords, ll_keywords) to use instead of extracting them
+        
+        Returns:
+            Dictionary with the answer, latency_ms, tokens (LLM usage of this
+            query), whether the answer came from the query cache, whether it
+            was coalesced with an identical in-flight query and error (the error
+            message if the query failed, in which case the answer is "Error: ...")
+        """
+        if not self.lightrag_instance:
+            raise RuntimeError("RAG not initialized. Call initialize() first.")
+        
+        start = time.perf_counter()
+        result, coalesced = await self.single_flight.run(
+            self._flight_key(text, mode, conversation_history),
+            partial(self._compute_query, text, mode, conversation_history, shared_keywords)
+        )
+        if coalesced:
+            result = dict(result, latency_ms=(time.perf_counter() - start) * 1000, tokens=TokenTracker().get_usage())
+        return dict(result, coalesced=coalesced)
+    
+    def _flight_key(self, text: str, mode: str, conversation_history: list = None) -> tuple:
+        """Key under which identical concurrent queries are coalesced"""
+        history = json.dumps(conversation_history or [], sort_keys=True, ensure_ascii=False)
+        # Queries started after an ingestion must not join a computation against the old index
+        index_version = self.query_cache.index_version if self.query_cache else 0
+        return (mode, QueryCache.normalize(text), hashlib.sha256(history.encode("utf-8")).hexdigest(), index_version)
+    
+    async def _compute_query(self, text: str, mode: str, conversation_history: list, shared_keywords) -> dict:
+        """Answer a query from the query cache or LightRAG (the body of query_with_stats)"""
+        tracker = TokenTracker()
+        start = time.perf_counter()
+        cached = None
+        error = None
+        try:
+            cached, cache_context = await self._get_cached_answer(text, mode, conversation_history)
+            if cached is not None:
+                answer = cached
+            else:
+                # A per-query LLM function so token usage is attributed to this query
+                params = self._query_params(mode, conversation_history,
+                                            model_func=partial(self.lightrag_instance.llm_model_func,
+                                                               _priority=5, token_tracker=tracker))
+                if mode != "naive" and shared_keywords:
+                    keywords = await shared_keywords()
+                    if keywords:
+                        params.hl_keywords, params.ll_keywords = keywords
+                
+                answer = await self.lightrag_instance.aquery(text, param=params)
+                self._cache_answer(cache_context, answer)
+            
+        except Exception as e:
+            logger.error(f"Error querying in {mode} mode: {e}")
+            error = str(e)
+            answer = f"Error: {error}"
+        
+        return {
+            "answer": answer,
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "tokens": tracker.get_usage(),
+            "cached": cached is not None,
+            "error": error,
+        }
+    
+    def get_mode_stats(self) -> dict:
+        """Get per-mode latency and token usage of the last query_all_modes call
+        
+        Returns:
+            Dictionary mapping each mode (and "keywords" for the shared keyword
+            extraction) to its latency_ms, tokens and whether it was cached
+        """
+        return dict(self.mode_stats)
+    
+    def create_conversation_history(self) -> ConversationHistory:
+        """Create an empty chat history that stays within HISTORY_MAX_TOKENS
+        
+        Older turns are folded into an LLM summary when HISTORY_COMPACTION is
+        "summarize" and dropped when it is "drop".
+        """
+        summarize = self.summarize_conversation if Config.HISTORY_COMPACTION == "summarize" else None
+        return ConversationHistory(Config.HISTORY_MAX_TOKENS, Config.HISTORY_KEEP_TURNS, summarize)
+    
+    async def summarize_conversation(self, summary: str, turns: list, max_words: int,
+                                     token_tracker=None) -> str:
+        """Fold conversation turns into the running summary of a chat session
+        
+        Args:
+            summary: Current summary ("" if there is none yet)
+            turns: List of (question, answer) tuples to fold in
+            max_words: Word limit for the new summary
+            token_tracker: Optional per-turn tracker for the tokens of the summary call
+        """
+        if not self.lightrag_instance:
+            raise RuntimeError("RAG not initialized. Call initialize() first.")
+        
+        transcript = "\n\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+        prompt = (f"Current summary:\n{summary or '(none)'}\n\n"
+                  f"New conversation turns:\n{transcript}\n\n"
+                  f"Write the updated summary in at most {max_words} words.")
+        system_prompt = ("You maintain a concise running summary of a conversation about a database. "
+                         "Keep the facts the user may refer back to, and keep table, column and other "
+                         "object names exactly as written. Reply with the summary only.")
+        return await self.lightrag_instance.llm_model_func(prompt, system_prompt=system_prompt,
+                                                           token_tracker=token_tracker)
+    
     def get_token_usage(self) -> dict:
         """Get current token usage statistics"""
         if self.enable_token_tracking:
             return self.token_tracker.get_usage()
         return {"total_tokens": 0, "prompt_tokens": 0, "completion_tokens": 0}
     
+    def get_embedding_cache_stats(self) -> dict:
+        """Get embedding cache statistics (empty if caching is disabled)"""
+        if self.embedding_cache:
+            return self.embedding_cache.get_stats()
+        return {}
+    
+    def get_keyword_cache_stats(self) -> dict:
+        """Get keyword extraction cache statistics (empty if caching is disabled)"""
+        if self.keyword_cache:
+            return self.keyword_cache.get_stats()
+        return {}
+    
+    def get_query_cache_stats(self) -> dict:
+        """Get query answer cache statistics (empty if caching is disabled)"""
+        if self.query_cache:
+            return self.query_cache.get_stats()
+        return {}
+    
+    def get_coalescing_stats(self) -> dict:
+        """Get counts of query computations and of identical concurrent queries that shared them"""
+        return self.single_flight.get_stats()
+    
+    def get_embedding_batch_stats(self) -> dict:
+        """Get embedding request coalescing and splitting statistics (empty before initialization)"""
+        stats = {}
+        if self.embedding_splitter:
+            stats.update(self.embedding_splitter.get_stats())
+        if self.embedding_batcher:
+            stats.update(self.embedding_batcher.get_stats())
+        return stats
+    
     def reset_token_tracker(self):
         """Reset token usage statistics"""
         if self.enable_token_tracking:
@@ -0,0 +1,190 @@
+"""Persistent, content-addressed cache for LLM responses."""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """On-disk LLM response cache keyed by a hash of provider, model, prompt and content.
+
+    Every entry is stored as a small JSON file under a two-character fan-out
+    directory. Reads refresh the file modification time, so eviction removes the
+    least recently used entries once the cache grows beyond its size limit.
+    """
+
+    def __init__(self, cache_dir: Path, max_size_bytes: int):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_size_bytes: Size limit after which least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self._size_bytes = None  # Computed lazily on the first write
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a content-addressed key from the given parts.
+
+        Each part is length-prefixed so that different splits of the same
+        characters never produce the same key.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = (part or "").encode("utf-8")
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss"""
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+                # Refresh modification time so eviction is least recently used
+                os.utime(path)
+                self._stats["hits"] += 1
+                return entry["response"]
+            except FileNotFoundError:
+                self._stats["misses"] += 1
+                return None
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable response cache entry {path}: {e}")
+                self._stats["misses"] += 1
+                return None
+
+    def put(self, key: str, response: str, metadata: Dict[str, Any] = None):
+        """Store a response; failures are logged and never raised"""
+        path = self._entry_path(key)
+        entry = {"response": response, "created_at": time.time()}
+        if metadata:
+            entry.update(metadata)
+
+        with self._lock:
+            try:
+                if self._size_bytes is None:
+                    self._size_bytes = sum(f.stat().st_size for f in self.cache_dir.glob("*/*.json"))
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                old_size = path.stat().st_size if path.exists() else 0
+                tmp_path = path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(tmp_path, path)
+
+                self._size_bytes += path.stat().st_size - old_size
+                self._stats["writes"] += 1
+
+                if self._size_bytes > self.max_size_bytes:
+                    self._evict()
+            except OSError as e:
+                logger.warning(f"Failed to write response cache entry {path}: {e}")
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is below 90% of its limit"""
+        target_size = int(self.max_size_bytes * 0.9)
+        entries = []
+        for f in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = f.stat()
+                entries.append((stat.st_mtime, stat.st_size, f))
+            except OSError:
+                continue
+        entries.sort()
+
+        self._size_bytes = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, f in entries:
+            if self._size_bytes <= target_size:
+                break
+            try:
+                f.unlink()
+                self._size_bytes -= size
+                evicted += 1
+            except OSError as e:
+                logger.warning(f"Failed to evict response cache entry {f}: {e}")
+
+        self._stats["evictions"] += evicted
+        logger.info(f"Evicted {evicted} response cache entries, cache size is now {self._size_bytes:,} bytes")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            stats = self._stats.copy()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        """Reset cache hit/miss statistics (cached entries are kept)"""
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache, or None if caching is disabled"""
+    global _response_cache
+
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+
+    if _response_cache is None:
+        with _response_cache_lock:
+            # Double-check pattern
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    cache_dir=Config.RESPONSE_CACHE_DIR,
+                    max_size_bytes=Config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+                )
+                logger.info(f"Created response cache in {Config.RESPONSE_CACHE_DIR} "
+                            f"(limit {Config.RESPONSE_CACHE_MAX_MB} MB)")
+
+    return _response_cache
+
+
+# Keyword extraction results of RAG queries, kept apart from documentation responses
+_keyword_cache: Optional[ResponseCache] = None
+_keyword_cache_lock = threading.Lock()
+
+
+def get_keyword_cache() -> Optional[ResponseCache]:
+    """Get the shared keyword extraction cache, or None if caching is disabled"""
+    global _keyword_cache
+
+    if not Config.KEYWORD_CACHE_ENABLED:
+        return None
+
+    if _keyword_cache is None:
+        with _keyword_cache_lock:
+            # Double-check pattern
+            if _keyword_cache is None:
+                _keyword_cache = ResponseCache(
+                    cache_dir=Config.KEYWORD_CACHE_DIR,
+                    max_size_bytes=Config.KEYWORD_CACHE_MAX_MB * 1024 * 1024
+                )
+                logger.info(f"Created keyword cache in {Config.KEYWORD_CACHE_DIR} "
+                            f"(limit {Config.KEYWORD_CACHE_MAX_MB} MB)")
+
+    return _keyword_cache
@@ -0,0 +1,158 @@
+"""HTTP query server sharing one warm RAGManager between concurrent chat sessions."""
+
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+from lightrag.utils import TokenTracker
+from .config import Config
+from .conversation_history import ConversationHistory
+from .token_aggregator import TokenAggregator
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRequest(BaseModel):
+    query: str = Field(min_length=1)
+    mode: Literal["naive", "local", "global", "hybrid"] = "hybrid"
+    session_id: Optional[str] = Field(default=None, description="Omit to start a new session")
+
+
+class QueryResponse(BaseModel):
+    session_id: str
+    mode: str
+    answer: str
+    cached: bool
+    latency_ms: float
+    token_usage: Dict[str, int]
+    history_tokens: int
+
+
+class HistoryResponse(BaseModel):
+    session_id: str
+    messages: List[Dict[str, str]]
+    stats: Dict[str, int]
+
+
+class ChatSession:
+    """Conversation history of one client; its queries are answered one at a time"""
+
+    def __init__(self, history: ConversationHistory):
+        self.history = history
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionStore:
+    """Chat sessions by id, expired after SERVER_SESSION_TTL_SECONDS of inactivity
+    and evicted least recently used first above SERVER_MAX_SESSIONS"""
+
+    def __init__(self, rag_manager, max_sessions: int, ttl_seconds: float):
+        self.rag_manager = rag_manager
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()  # session id -> ChatSession, least recently used first
+
+    def get_or_create(self, session_id: Optional[str] = None) -> tuple:
+        """Return (session id, session), starting a new session for unknown or missing ids"""
+        self._expire()
+        session_id = session_id or uuid.uuid4().hex
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = ChatSession(self.rag_manager.create_conversation_history())
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                logger.info(f"Evicted least recently used session {evicted}")
+        self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session_id, session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        self._expire()
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        if not self.ttl_seconds:
+            return
+        now = time.monotonic()
+        for session_id in [sid for sid, session in self._sessions.items()
+                           if now - session.last_used > self.ttl_seconds and not session.lock.locked()]:
+            del self._sessions[session_id]
+            logger.debug(f"Session {session_id} expired")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def create_app(rag_manager, token_aggregator: Optional[TokenAggregator] = None) -> FastAPI:
+    """Create the query API around an initialized RAGManager
+
+    Queries of different sessions run concurrently against the shared
+    LightRAG instance (bounded by LLM_MAX_ASYNC); queries within a session
+    are serialized so each sees the previous answer in its history.
+    """
+    sessions = SessionStore(rag_manager, Config.SERVER_MAX_SESSIONS, Config.SERVER_SESSION_TTL_SECONDS)
+    token_aggregator = token_aggregator or TokenAggregator(rag_manager=rag_manager)
+    app = FastAPI(title="DBChat3", description="Query database documentation through LightRAG")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "sessions": len(sessions)}
+
+    @app.post("/query", response_model=QueryResponse)
+    async def query(request: QueryRequest):
+        session_id, session = sessions.get_or_create(request.session_id)
+        async with session.lock:
+            result = await rag_manager.query_with_stats(request.query, request.mode, session.history.messages())
+            if result["error"]:
+                # Keep the failed turn out of the history so the session can simply retry
+                logger.warning(f"Session {session_id}: {request.mode} query failed: {result['error']}")
+                raise HTTPException(status_code=502, detail=f"Query failed: {result['error']}")
+            # Tokens of a history summary triggered by this turn are reported with it
+            summary_tracker = TokenTracker()
+            await session.history.add_turn(request.query, result["answer"], token_tracker=summary_tracker)
+            session.last_used = time.monotonic()
+        token_usage = dict(result["tokens"])
+        for key, value in summary_tracker.get_usage().items():
+            token_usage[key] = token_usage.get(key, 0) + value
+
+        source = "cached" if result["cached"] else f"{token_usage.get('total_tokens', 0)} tokens"
+        logger.info(f"Session {session_id}: {request.mode} query answered in {result['latency_ms']:.0f} ms ({source})")
+        return QueryResponse(
+            session_id=session_id,
+            mode=request.mode,
+            answer=result["answer"],
+            cached=result["cached"],
+            latency_ms=result["latency_ms"],
+            token_usage=token_usage,
+            history_tokens=session.history.token_count(),
+        )
+
+    @app.get("/sessions/{session_id}/history", response_model=HistoryResponse)
+    async def history(session_id: str):
+        session = sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+        return HistoryResponse(session_id=session_id, messages=session.history.messages(),
+                               stats=session.history.get_stats())
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        if not sessions.delete(session_id):
+            raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+        return {"session_id": session_id, "deleted": True}
+
+    @app.get("/stats")
+    async def stats():
+        """Token usage since the server started and cache statistics"""
+        return token_aggregator.get_total_usage()
+
+    return app
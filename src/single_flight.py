@@ -0,0 +1,55 @@
+"""Deduplication of identical concurrent async computations."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time.
+
+    A caller that arrives while a computation with the same key is in flight
+    waits for it and receives its result (or exception) instead of starting
+    its own. The computation is shielded from cancellation of any single
+    caller, so a disconnecting client does not fail the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {"executions": 0, "coalesced": 0}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return the result of func(), shared with identical in-flight calls
+
+        Returns:
+            Tuple of the result and whether it was shared from another caller's computation
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self._stats["coalesced"] += 1
+            logger.debug(f"Joined in-flight computation for {key!r}")
+        else:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self._stats["executions"] += 1
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution and coalescing counts"""
+        stats = self._stats.copy()
+        stats["in_flight"] = len(self._in_flight)
+        requests = stats["executions"] + stats["coalesced"]
+        stats["coalesce_rate"] = stats["coalesced"] / requests if requests else 0.0
+        return stats
+
+    def reset_stats(self):
+        """Reset execution and coalescing counts"""
+        self._stats = self._empty_stats()
@@ -37,6 +37,66 @@ class TokenAggregator:
             return self.azure_client.get_token_usage()
         return {"total_tokens": 0, "prompt_tokens": 0, "completion_tokens": 0}
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get documentation response cache statistics from the LLM client.
+        
+        Returns:
+            Dictionary with cache hits, misses and hit rate or empty dict if unavailable
+        """
+        if self.azure_client and hasattr(self.azure_client, 'get_cache_stats'):
+            return self.azure_client.get_cache_stats()
+        return {}
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache statistics from the RAG manager.
+        
+        Returns:
+            Dictionary with cache hits, misses and hit rate or empty dict if unavailable
+        """
+        if self.rag_manager and hasattr(self.rag_manager, 'get_embedding_cache_stats'):
+            return self.rag_manager.get_embedding_cache_stats()
+        return {}
+    
+    def get_keyword_cache_stats(self) -> Dict[str, Any]:
+        """Get query keyword extraction cache statistics from the RAG manager.
+        
+        Returns:
+            Dictionary with cache hits, misses and hit rate or empty dict if unavailable
+        """
+        if self.rag_manager and hasattr(self.rag_manager, 'get_keyword_cache_stats'):
+            return self.rag_manager.get_keyword_cache_stats()
+        return {}
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Get query answer cache statistics from the RAG manager.
+        
+        Returns:
+            Dictionary with cache hits, paraphrase hits, misses and hit rate or empty dict if unavailable
+        """
+        if self.rag_manager and hasattr(self.rag_manager, 'get_query_cache_stats'):
+            return self.rag_manager.get_query_cache_stats()
+        return {}
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics of identical concurrent queries from the RAG manager.
+        
+        Returns:
+            Dictionary with execution, coalesced and in-flight counts or empty dict if unavailable
+        """
+        if self.rag_manager and hasattr(self.rag_manager, 'get_coalescing_stats'):
+            return self.rag_manager.get_coalescing_stats()
+        return {}
+    
+    def get_embedding_batch_stats(self) -> Dict[str, Any]:
+        """Get embedding request batching statistics from the RAG manager.
+        
+        Returns:
+            Dictionary with request, batch, provider call and retry counts or empty dict if unavailable
+        """
+        if self.rag_manager and hasattr(self.rag_manager, 'get_embedding_batch_stats'):
+            return self.rag_manager.get_embedding_batch_stats()
+        return {}
+    
     def get_rag_usage(self) -> Dict[str, int]:
         """Get token usage from RAG manager.
         
@@ -71,7 +131,15 @@ class TokenAggregator:
             "breakdown": {
                 "documentation": azure_usage,
                 "rag": rag_usage
-            }
+            },
+            "cache": {
+                "documentation": self.get_cache_stats(),
+                "embedding": self.get_embedding_cache_stats(),
+                "keywords": self.get_keyword_cache_stats(),
+                "query": self.get_query_cache_stats()
+            },
+            "query_coalescing": self.get_coalescing_stats(),
+            "embedding_batching": self.get_embedding_batch_stats()
         }
         
         return total_usage
@@ -109,6 +177,16 @@ class TokenAggregator:
                     f"  Completion: {doc_usage['completion_tokens']:,}"
                 ])
             
+            # Documentation response cache
+            doc_cache = usage["cache"]["documentation"]
+            if doc_cache.get("hits", 0) + doc_cache.get("misses", 0) > 0:
+                summary_lines.extend([
+                    f"\nDocumentation Response Cache:",
+                    f"  Hits: {doc_cache['hits']:,}",
+                    f"  Misses: {doc_cache['misses']:,}",
+                    f"  Hit Rate: {doc_cache['hit_rate']:.1%}"
+                ])
+            
             # RAG usage
             rag_usage = breakdown["rag"]
             if rag_usage["total_tokens"] > 0:
@@ -118,6 +196,61 @@ class TokenAggregator:
                     f"  Prompt: {rag_usage['prompt_tokens']:,}",
                     f"  Completion: {rag_usage['completion_tokens']:,}"
                 ])
+            
+            # Embedding cache
+            embedding_cache = usage["cache"]["embedding"]
+            if embedding_cache.get("hits", 0) + embedding_cache.get("misses", 0) > 0:
+                summary_lines.extend([
+                    f"\nEmbedding Cache:",
+                    f"  Hits: {embedding_cache['hits']:,}",
+                    f"  Misses: {embedding_cache['misses']:,}",
+                    f"  Hit Rate: {embedding_cache['hit_rate']:.1%}"
+                ])
+            
+            # Keyword extraction cache
+            keyword_cache = usage["cache"]["keywords"]
+            if keyword_cache.get("hits", 0) + keyword_cache.get("misses", 0) > 0:
+                summary_lines.extend([
+                    f"\nKeyword Cache:",
+                    f"  Hits: {keyword_cache['hits']:,}",
+                    f"  Misses: {keyword_cache['misses']:,}",
+                    f"  Hit Rate: {keyword_cache['hit_rate']:.1%}"
+                ])
+            
+            # Query answer cache
+            query_cache = usage["cache"]["query"]
+            if query_cache.get("hits", 0) + query_cache.get("misses", 0) > 0:
+                summary_lines.extend([
+                    f"\nQuery Cache:",
+                    f"  Hits: {query_cache['hits']:,} ({query_cache['semantic_hits']:,} paraphrased)",
+                    f"  Misses: {query_cache['misses']:,}",
+                    f"  Hit Rate: {query_cache['hit_rate']:.1%}"
+                ])
+            
+            # Identical concurrent queries sharing one computation
+            coalescing = usage["query_coalescing"]
+            if coalescing.get("coalesced", 0) > 0:
+                summary_lines.extend([
+                    f"\nQuery Coalescing:",
+                    f"  Computations: {coalescing['executions']:,}",
+                    f"  Coalesced Queries: {coalescing['coalesced']:,}",
+                    f"  Coalesce Rate: {coalescing['coalesce_rate']:.1%}"
+                ])
+            
+            # Embedding request batching
+            batching = usage["embedding_batching"]
+            if batching.get("provider_calls", 0) > 0:
+                summary_lines.append(f"\nEmbedding Batching:")
+                if batching.get("batches", 0) > 0:
+                    summary_lines.extend([
+                        f"  Requests: {batching['requests']:,}",
+                        f"  Merged Batches: {batching['batches']:,}",
+                        f"  Avg Texts per Batch: {batching['avg_batch_texts']:.1f}"
+                    ])
+                summary_lines.extend([
+                    f"  Provider Calls: {batching['provider_calls']:,}",
+                    f"  Retries: {batching['retries']:,} ({batching['throttled']:,} throttled, {batching['timeouts']:,} timeouts)"
+                ])
         
         summary_lines.append("=" * 26)
         
@@ -129,6 +262,9 @@ class TokenAggregator:
             self.azure_client.reset_token_usage()
             logger.info("Reset Azure client token usage")
         
+        if self.azure_client and hasattr(self.azure_client, 'reset_cache_stats'):
+            self.azure_client.reset_cache_stats()
+        
         if self.rag_manager and hasattr(self.rag_manager, 'reset_token_tracker'):
             self.rag_manager.reset_token_tracker()
             logger.info("Reset RAG manager token usage")
\ No newline at end of file